@@ -169,30 +169,34 @@ class CommonHelpers:
         return value, token
 
     @staticmethod
-    async def initialize_playwright(browser_type="chromium"):
+    async def initialize_playwright(browser_type="chromium", headless=False, ws_endpoint=None):
         print("Starting Playwright")
         try:
+            if browser_type not in ("chromium", "firefox", "webkit"):
+                raise ValueError(
+                    "Invalid browser type. Choose 'chromium', 'firefox' or 'webkit'."
+                )
+
             playwright = await async_playwright().start()
             print("Playwright started")
 
-            if browser_type == "chromium":
-                print("Creating Chromium Browser")
-                browser = await playwright.chromium.launch(headless=False)
-                context = await browser.new_context(
-                    user_agent="Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/119.0",
-                    viewport={"width": 1920, "height": 1080},
-                )
-            elif browser_type == "firefox":
-                print("Creating Firefox Browser")
-                browser = await playwright.firefox.launch(headless=False)
-                context = await browser.new_context(
-                    user_agent="Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/119.0",
-                    viewport={"width": 1920, "height": 1080},
+            browser_launcher = getattr(playwright, browser_type)
+            if ws_endpoint:
+                # A launchServer() endpoint hands out its running browser and ignores the launch
+                # options; `playwright run-server` launches a fresh browser with them per connection
+                print(f"Connecting to {browser_type.capitalize()} Browser at {ws_endpoint}")
+                browser = await browser_launcher.connect(
+                    ws_endpoint,
+                    headers={"x-playwright-launch-options": json.dumps({"headless": headless})},
                 )
             else:
-                raise ValueError(
-                    "Invalid browser type. Choose 'chromium' or 'firefox'."
-                )
+                print(f"Creating {browser_type.capitalize()} Browser")
+                browser = await browser_launcher.launch(headless=headless)
+
+            context = await browser.new_context(
+                user_agent="Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:109.0) Gecko/20100101 Firefox/119.0",
+                viewport={"width": 1920, "height": 1080},
+            )
 
             print("Browser and context created")
             return playwright, context, browser
@@ -200,10 +204,10 @@ class CommonHelpers:
             print(f"Error in initialize_playwright: {e}")
             raise
 
-    async def run_crawler(self, crawler_instance):
+    async def run_crawler(self, crawler_instance, browser_type="firefox", headless=False, ws_endpoint=None):
         print("Starting Crawler")
         playwright, context, browser = await CommonHelpers.initialize_playwright(
-            browser_type="firefox"
+            browser_type=browser_type, headless=headless, ws_endpoint=ws_endpoint
         )
 
         print(f"\n{self.ansi_colors.color_text('Crawling:', self.ansi_colors.BLUE)} {self.ansi_colors.color_text('In progress...', self.ansi_colors.GREEN)}\n")
@@ -218,6 +222,7 @@ class CommonHelpers:
 
         print(f"\n{self.ansi_colors.color_text('Crawling:', self.ansi_colors.BLUE)} {self.ansi_colors.color_text('Done!', self.ansi_colors.GREEN)}\n")
         await context.close()
+        # For a connected browser this only disconnects; the server keeps running
         await browser.close()
         await playwright.stop()
 
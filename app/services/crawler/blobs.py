@@ -0,0 +1,44 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+
+class BlobStore:
+    """Stores response bodies once per SHA-256 digest, however many URLs serve them."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.known_digests = set()
+
+    def path_for(self, digest):
+        # Fan out on the first byte so no single directory grows huge
+        return self.directory / digest[:2] / digest
+
+    def put(self, data, content_type):
+        """Store a body and return the record that replaces it in the results."""
+        digest = hashlib.sha256(data).hexdigest()
+        record = {
+            "body_digest": digest,
+            "body_size": len(data),
+            "content_type": content_type,
+        }
+        if digest not in self.known_digests:
+            path = self.path_for(digest)
+            if not path.exists():
+                path.parent.mkdir(exist_ok=True)
+                # Write then rename, so shard processes storing the same asset
+                # never expose a half-written blob to each other.
+                file_descriptor, temporary_path = tempfile.mkstemp(dir=path.parent)
+                with os.fdopen(file_descriptor, "wb") as file:
+                    file.write(data)
+                os.replace(temporary_path, path)
+            self.known_digests.add(digest)
+
+        record["body_stored"] = True
+        return record
+
+    def get(self, digest):
+        with open(self.path_for(digest), "rb") as file:
+            return file.read()
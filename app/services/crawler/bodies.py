@@ -0,0 +1,71 @@
+import hashlib
+
+
+class BodyPolicy:
+    """Decides how much of a response body is worth fetching and keeping.
+
+    Bodies that cannot be worth it by their headers alone, including every body
+    of a skipped content type, are never fetched from the browser. The rest are
+    kept whole, cut down to a prefix of max_size bytes, or reduced to their
+    digest and size, by content type and size.
+    """
+
+    BINARY_TYPES = ("image", "audio", "video")
+    EMPTY_STATUSES = (204, 205, 304)
+    DEFAULT_SKIP_TYPES = ("font", "octet-stream")
+
+    def __init__(self, max_size=None, skip_types=DEFAULT_SKIP_TYPES):
+        self.max_size = max_size
+        self.skip_types = tuple(skip_types)
+
+    def is_binary(self, content_type):
+        return any(binary_type in content_type for binary_type in self.BINARY_TYPES)
+
+    def should_fetch(self, status, content_type, declared_size):
+        """Whether a body is worth pulling through the driver, judged by its headers."""
+        if status in self.EMPTY_STATUSES or status < 200:
+            return False
+        if any(skip_type in content_type for skip_type in self.skip_types):
+            return False
+        # A compressed transfer only understates the size, so this never skips a body that fits
+        return self.max_size is None or declared_size is None or declared_size <= self.max_size
+
+    def decide(self, content_type, size):
+        if self.max_size is not None and size > self.max_size:
+            # Half an image is no use to anyone, half a page still has its links
+            return "hash" if self.is_binary(content_type) else "truncate"
+        return "keep"
+
+    def kept(self, body, content_type):
+        """The part of a body the policy keeps, or None when only its digest is kept."""
+        action = self.decide(content_type, len(body))
+        if action == "hash":
+            return None
+        return body[: self.max_size] if action == "truncate" else body
+
+    def decode(self, body, content_type):
+        """The body as text, or None when it is binary."""
+        if self.is_binary(content_type):
+            return None
+        try:
+            return body.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+
+    @staticmethod
+    def metadata_record(content_type, declared_size):
+        return {
+            "body_size": declared_size,
+            "content_type": content_type,
+            "body_stored": False,
+            "body_fetched": False,
+        }
+
+    @staticmethod
+    def digest_record(body, content_type):
+        return {
+            "body_digest": hashlib.sha256(body).hexdigest(),
+            "body_size": len(body),
+            "content_type": content_type,
+            "body_stored": False,
+        }
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from collections import deque
+
+
+class CapturePipeline:
+    """Runs request and response handlers on a fixed pool of consumers.
+
+    Playwright fires its events synchronously, so a full queue cannot hold the
+    browser back. Events past the bound wait in an overflow list instead, and
+    the click loop is throttled until the backlog is back within the bound.
+    """
+
+    def __init__(self, max_size=1000, consumers=4, poll_interval=0.05):
+        self.max_size = max_size
+        self.consumers = consumers
+        self.poll_interval = poll_interval
+        self.queue = asyncio.Queue(maxsize=max_size)
+        self.overflow = deque()
+        self.tasks = []
+        self.active = 0
+        self.metrics = {
+            "captured": 0,
+            "processed": 0,
+            "failed": 0,
+            "overflowed": 0,
+            "max_backlog": 0,
+            "throttled_seconds": 0.0,
+        }
+
+    @property
+    def backlog(self):
+        return self.queue.qsize() + len(self.overflow)
+
+    @property
+    def idle(self):
+        return not self.backlog and not self.active
+
+    def start(self):
+        self.tasks = [asyncio.create_task(self.consume()) for _ in range(self.consumers)]
+
+    def submit(self, handler, *args):
+        """Queue handler(*args) without blocking the event callback that captured it."""
+        self.metrics["captured"] += 1
+        # Once anything has overflowed, later events queue behind it to keep the order
+        if self.overflow or self.queue.full():
+            self.overflow.append((handler, args))
+            self.metrics["overflowed"] += 1
+        else:
+            self.queue.put_nowait((handler, args))
+        self.metrics["max_backlog"] = max(self.metrics["max_backlog"], self.backlog)
+
+    def refill(self):
+        while self.overflow and not self.queue.full():
+            self.queue.put_nowait(self.overflow.popleft())
+
+    async def process(self, handler, args):
+        self.active += 1
+        try:
+            await handler(*args)
+            self.metrics["processed"] += 1
+        except Exception as e:
+            self.metrics["failed"] += 1
+            logging.error(f"Error in task: {e}")
+        finally:
+            self.active -= 1
+
+    async def consume(self):
+        while True:
+            handler, args = await self.queue.get()
+            try:
+                await self.process(handler, args)
+            finally:
+                # Refilled before task_done, so drain() cannot finish with events left over
+                self.refill()
+                self.queue.task_done()
+
+    async def throttle(self):
+        """Hold the caller back while the backlog is past the queue's bound."""
+        if not self.overflow:
+            return
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        while self.overflow:
+            await asyncio.sleep(self.poll_interval)
+        self.metrics["throttled_seconds"] += loop.time() - started
+
+    async def drain(self, timeout=30):
+        """Process everything captured so far, then stop the consumers.
+
+        Bounded by timeout, so a crawl being torn down cannot hang here. When the
+        consumers are gone, e.g. cancelled along with every other task on Ctrl-C,
+        what is left is processed inline instead.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        if any(not task.done() for task in self.tasks):
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logging.warning(f"Capture pipeline did not drain within {timeout}s, {self.backlog} events left")
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+        while self.backlog and loop.time() < deadline:
+            self.refill()
+            handler, args = self.queue.get_nowait()
+            try:
+                await asyncio.wait_for(self.process(handler, args), max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                self.metrics["failed"] += 1
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,85 @@
+import json
+import logging
+import sqlite3
+
+
+class CheckpointStore:
+    # Result lists only ever grow, so they are appended row by row; the rest
+    # of the crawl state is small enough to be replaced wholesale.
+    APPEND_ONLY = (
+        "pages_to_test",
+        "requests",
+        "static_requests",
+        "responses",
+        "static_responses",
+        "blocked_resources",
+    )
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "kind TEXT NOT NULL, position INTEGER NOT NULL, payload TEXT NOT NULL, "
+            "PRIMARY KEY (kind, position))"
+        )
+        self.connection.commit()
+        self.written_counts = {
+            kind: count
+            for kind, count in self.connection.execute(
+                "SELECT kind, COUNT(*) FROM records GROUP BY kind"
+            )
+        }
+
+    def reset(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM state")
+            self.connection.execute("DELETE FROM records")
+        self.written_counts = {}
+
+    def save(self, snapshot):
+        with self.connection:
+            for kind in self.APPEND_ONLY:
+                items = snapshot[kind]
+                start = self.written_counts.get(kind, 0)
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO records (kind, position, payload) VALUES (?, ?, ?)",
+                    (
+                        (kind, position, json.dumps(item))
+                        for position, item in enumerate(items[start:], start)
+                    ),
+                )
+                self.written_counts[kind] = len(items)
+
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+                (
+                    (key, json.dumps(value))
+                    for key, value in snapshot.items()
+                    if key not in self.APPEND_ONLY
+                ),
+            )
+        logging.info(f"Checkpoint written to {self.path}")
+
+    def load(self):
+        snapshot = {
+            key: json.loads(value)
+            for key, value in self.connection.execute("SELECT key, value FROM state")
+        }
+        if not snapshot:
+            raise ValueError(f"No checkpoint found in {self.path}")
+
+        for kind in self.APPEND_ONLY:
+            snapshot[kind] = [
+                json.loads(payload)
+                for (payload,) in self.connection.execute(
+                    "SELECT payload FROM records WHERE kind = ? ORDER BY position", (kind,)
+                )
+            ]
+        return snapshot
+
+    def close(self):
+        self.connection.close()
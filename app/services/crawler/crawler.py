@@ -2,36 +2,103 @@ from urllib.parse import urljoin, urlparse, parse_qs
 import asyncio
 import json
 import base64
+import hashlib
 import re
 import logging
 
+from .bodies import BodyPolicy
+from .capture import CapturePipeline
+from .frontier import Frontier
+from .har import HarWriter, iter_har_entries
+from .matching import ValueMatcher
+from .registry import ElementRegistry
+from .results import ResultStore
+from .settle import PageSettler
+from .sharding import shard_for_url
+from .templates import RequestTemplateIndex, request_template
+
 
 class Crawler:
     pages_to_test = []
-    requests = []
-    static_requests = []
-    responses = []
-    static_responses = []
-    detected_elements = []
-    detected_input_elements = []
-    encountered_urls = set()
     encountered_responses = set()
     filled_values = {}
     crawling_results = {}
 
-    def __init__(self, authentication, config, crawler_helpers, common_helpers):
+    def __init__(
+        self,
+        authentication,
+        config,
+        crawler_helpers,
+        common_helpers,
+        checkpoint_store=None,
+        recrawl_index=None,
+        result_store=None,
+        blob_store=None,
+        resource_blocker=None,
+        page_settler=None,
+        capture_pipeline=None,
+        body_policy=None,
+        har_writer=None,
+    ):
         self.authentication = authentication
         self.crawler_helpers = crawler_helpers
         self.common_helpers = common_helpers
+        self.checkpoint_store = checkpoint_store
+        self.recrawl_index = recrawl_index
+        self.result_store = result_store or ResultStore()
+        self.blob_store = blob_store
+        self.resource_blocker = resource_blocker
+        self.page_settler = page_settler or PageSettler()
+        self.capture = capture_pipeline or CapturePipeline()
+        self.body_policy = body_policy or BodyPolicy()
+        self.har_writer = har_writer
+        self.blocked_resources = set()
+        self.value_matcher = ValueMatcher()
+        self.request_templates = RequestTemplateIndex(config.get("request_samples", 1))
+        self.detected_elements = ElementRegistry()
+        self.detected_input_elements = ElementRegistry()
+        self.streamed_elements = {"detected_elements": 0, "detected_input_elements": 0}
+        self.page_validators = {}
+        self.checkpoint_interval = config.get("checkpoint_interval", 10)
+        self.pages_since_checkpoint = 0
+        self.in_flight_pages = []
+        self.resumed_pages = set()
         self.use_auth = config["use_auth"]
         self.username = config["username"]
         self.password = config["password"]
         self.base_url = config["base_url"]
-        self.pages_to_visit = config["starting_point"]
         self.constants = self.common_helpers.get_json_data('constants.json')
         self.user_param_names = self.constants.get("user_param_names", [])  # Safe access
         self.password_param_names = self.constants.get("password_param_names", [])  # Safe access
-        self.new_popup_page = None
+        self.workers = config.get("workers", 1)
+        self.incremental_detection = config.get("detection_mode", "full") == "incremental"
+        self.template_scope = config.get("template_scope", "page")
+        self.element_html = config.get("element_html", False)
+        self.scroll_mode = config.get("scroll_mode", "interval")
+        self.scroll_budget = config.get("scroll_budget", 30)
+        self.claimed_pages = 0
+        self.busy_workers = 0
+        self.shard_index = config.get("shard_index", 0)
+        self.shard_count = config.get("shard_count", 1)
+        self.frontier = Frontier(config["starting_point"], config.get("frontier_order", "bfs"))
+        self.foreign_pages = {}  # Canonical URL -> page owned by another shard, in discovery order
+        # Set while a shard coordinator may still send pages, so idle workers wait instead of stopping
+        self.expecting_pages = False
+
+        if self.recrawl_index:
+            # Pages found by clicking are only reachable if the page they were
+            # found on is crawled again, so seed everything the last run saw.
+            for url in self.recrawl_index.pages_to_test:
+                self.enqueue_page(url)
+
+        if config.get("seed_har"):
+            self.seed_from_har(config["seed_har"])
+
+        if self.checkpoint_store:
+            if config.get("resume"):
+                self.restore_checkpoint(self.checkpoint_store.load())
+            else:
+                self.checkpoint_store.reset()
 
         self.skip_extensions = (
             ".jpg",
@@ -69,109 +136,336 @@ class Crawler:
 
     async def run(self, context):
         self.domain = urlparse(self.base_url).netloc
+        if self.resource_blocker:
+            self.resource_blocker.on_blocked = self.record_blocked_resource
+            await self.resource_blocker.attach(context)
+        self.capture.start()
+        pages = [await self.open_worker_page(context) for _ in range(self.workers)]
+
+        try:
+            if self.use_auth:
+                await self.authentication.run(pages[0])
+
+            await asyncio.gather(*(self.crawl_worker(page) for page in pages))
+        except Exception as e:
+            logging.error(f"Error during crawling: {e}\n")
+        finally:
+            # Also runs when the crawl is cancelled, e.g. on Ctrl-C. Saved before
+            # draining, so the crawl state is safe whatever happens to the queue,
+            # then again with the traffic the still open pages let us process.
+            self.save_checkpoint()
+            await self.capture.drain()
+            self.save_checkpoint()
+
+        for page in pages:
+            self.crawler_helpers.forget_page(page)
+            await page.close()
+
+        # Whatever the pages captured while they were closing
+        await self.capture.drain()
+        logging.info(f"Capture pipeline: {self.capture.metrics}")
+        self.result_store.close()
+        if self.har_writer:
+            self.har_writer.close()
+        crawling_results = {
+            "pages_to_test": self.pages_to_test,
+            "detected_elements": self.detected_elements.elements,
+            "detected_input_elements": self.detected_input_elements.elements,
+            "requests": self.result_store.records["requests"],
+            "static_requests": self.result_store.records["static_requests"],
+            "responses": self.result_store.records["responses"],
+            "static_responses": self.result_store.records["static_responses"],
+            "blocked_resources": self.result_store.records["blocked_resources"],
+            "page_validators": self.page_validators,
+            "result_counts": self.result_store.counts,
+            "capture_metrics": self.capture.metrics,
+            "request_template_hits": self.request_templates.hits,
+        }
+
+        return crawling_results
+
+    async def open_worker_page(self, context):
         page = await context.new_page()
+        await self.page_settler.attach(page)
 
         page.on("popup", self.capture_new_page)
         page.on(
             "response",
-            lambda response: asyncio.create_task(
-                self.log_and_continue_response(
-                    response, self.domain, self.encountered_responses
-                )
+            lambda response: self.capture.submit(
+                self.log_and_continue_response, response, self.domain, self.encountered_responses
             ),
         )
         page.on(
             "request",
-            lambda request: asyncio.create_task(
-                self.log_and_continue_request(
-                    page,
-                    request,
-                    self.domain,
-                    self.encountered_urls,
-                    self.user_param_names,
-                    self.password_param_names,
-                )
+            lambda request: self.capture.submit(
+                self.log_and_continue_request,
+                page,
+                request,
+                self.domain,
+                self.request_templates,
+                self.user_param_names,
+                self.password_param_names,
+                # The handler may run well after the event, so take the page's state now
+                page.url,
+                dict(self.filled_values.get(page, {})),
             ),
         )
 
+        return page
+
+    def seed_from_har(self, har_path):
+        """Treat the traffic in a HAR file as already discovered.
+
+        Its HTML pages go to the frontier and its requests count as samples of
+        their templates, so the crawl does not record them again.
+        """
+        domain = urlparse(self.base_url).netloc
+        seeded_pages = 0
+        seeded_requests = 0
+        for entry in iter_har_entries(har_path):
+            request = entry.get("request") or {}
+            url = request.get("url", "")
+            if urlparse(url).netloc != domain:
+                continue
+            method = request.get("method", "GET")
+            post_data = (request.get("postData") or {}).get("text")
+            self.request_templates.add(self.request_key(url, method, post_data))
+            seeded_requests += 1
+
+            response = entry.get("response") or {}
+            mime_type = (response.get("content") or {}).get("mimeType", "")
+            is_document = entry.get("_resourceType") == "document" or "text/html" in mime_type
+            if method == "GET" and is_document and response.get("status", 0) < 400:
+                if self.enqueue_page(url):
+                    seeded_pages += 1
+        logging.info(f"Seeded {seeded_pages} pages and {seeded_requests} requests from {har_path}")
+
+    def enqueue_page(self, url):
+        key = Frontier.canonicalize(url)
+        if key in self.foreign_pages:
+            return False
+        if self.shard_count > 1 and shard_for_url(url, self.shard_count) != self.shard_index:
+            self.foreign_pages[key] = url
+            return True
+        return self.frontier.add(url)
+
+    def claim_next_page(self):
+        # Workers share one event loop, so claiming a URL and marking the
+        # worker busy happen without yielding and can never race.
+        one_page = self.frontier.pop()
+        if one_page is None:
+            return None
+        index = self.claimed_pages
+        self.claimed_pages += 1
+        self.busy_workers += 1
+        return index, one_page
+
+    async def crawl_worker(self, page):
+        while True:
+            claimed = self.claim_next_page()
+            if claimed is None:
+                # Busy workers and queued response handlers may still discover
+                # pages, so only stop once neither has anything left.
+                if self.is_idle() and not self.expecting_pages:
+                    break
+                await asyncio.sleep(0.1)
+                continue
+
+            index, one_page = claimed
+            self.in_flight_pages.append(one_page)
+            try:
+                await self.capture.throttle()
+                await self.crawl_page(page, index, one_page)
+            except Exception as e:
+                logging.error(f"Error during crawling {one_page}: {e}\n")
+            finally:
+                self.busy_workers -= 1
+
+            # Not reached on cancellation, so an interrupted page stays in
+            # flight and the final checkpoint schedules it again.
+            self.in_flight_pages.remove(one_page)
+            self.pages_since_checkpoint += 1
+            if self.pages_since_checkpoint >= self.checkpoint_interval:
+                self.save_checkpoint()
+
+    def is_idle(self):
+        """Nothing left to crawl and nothing captured that could still queue a page."""
+        return self.busy_workers == 0 and self.frontier.pending_count == 0 and self.capture.idle
+
+    def checkpoint_snapshot(self):
+        return {
+            "frontier": self.frontier.to_state(self.in_flight_pages),
+            "claimed_pages": self.claimed_pages,
+            "request_templates": self.request_templates.to_state(),
+            "encountered_responses": list(self.encountered_responses),
+            "detected_elements": self.detected_elements.elements,
+            "detected_input_elements": self.detected_input_elements.elements,
+            "pages_to_test": self.pages_to_test,
+            "requests": self.result_store.records["requests"],
+            "static_requests": self.result_store.records["static_requests"],
+            "responses": self.result_store.records["responses"],
+            "static_responses": self.result_store.records["static_responses"],
+            "blocked_resources": self.result_store.records["blocked_resources"],
+            "blocked_resource_keys": list(self.blocked_resources),
+            "page_validators": self.page_validators,
+            "result_counts": self.result_store.counts,
+            "streamed_elements": self.streamed_elements,
+        }
+
+    def save_checkpoint(self):
+        if not self.checkpoint_store:
+            return
+        # Taken without awaiting, so no worker can change the state mid-snapshot
+        self.checkpoint_store.save(self.checkpoint_snapshot())
+        self.pages_since_checkpoint = 0
+
+    def restore_checkpoint(self, snapshot):
+        self.frontier = Frontier.from_state(snapshot["frontier"])
+        self.claimed_pages = snapshot["claimed_pages"]
+        self.request_templates = RequestTemplateIndex.from_state(
+            snapshot.get("request_templates", {}), self.request_templates.samples_per_template
+        )
+        self.encountered_responses = {tuple(key) for key in snapshot["encountered_responses"]}
+        self.detected_elements = ElementRegistry(snapshot["detected_elements"])
+        self.detected_input_elements = ElementRegistry(snapshot["detected_input_elements"])
+        self.pages_to_test = snapshot["pages_to_test"]
+        self.result_store.restore(snapshot, snapshot.get("result_counts", {}))
+        # So a resumed crawl does not record them again. The keys are saved because NDJSON
+        # and counter modes keep no records in memory; older checkpoints only have records.
+        self.blocked_resources = {tuple(key) for key in snapshot.get("blocked_resource_keys", [])} | {
+            (blocked_info["url"], blocked_info["method"])
+            for blocked_info in map(json.loads, snapshot.get("blocked_resources", []))
+        }
+        self.page_validators = snapshot.get("page_validators", {})
+        self.streamed_elements = snapshot.get("streamed_elements", self.streamed_elements)
+        self.resumed_pages = set(self.pages_to_test)
+        logging.info(
+            f"Resumed crawl with {len(self.pages_to_test)} pages tested and "
+            f"{self.frontier.pending_count} pages pending"
+        )
+
+    async def crawl_page(self, page, index, one_page):
+        if self.should_skip(one_page, self.skip_extensions):
+            logging.info(f"Skipping {one_page} due to its extension.")
+            return
+
+        if any(page_to_avoid in one_page for page_to_avoid in self.avoid_pages):
+            logging.info(f"Skipping {one_page} due to your requirement.")
+            return
+
         try:
+            response = await page.goto(one_page, timeout=30000)
+            await self.page_settler.settle(page)
+        except Exception as e:
+            logging.error(f"Failed to navigate to {one_page}, skipping... Error: {e}")
+            return
+
+        current_url = page.url
+        if current_url != one_page:
             if self.use_auth:
+                if index > 1 and self.frontier.pending_count == 0:
+                    self.frontier.requeue(self.base_url)
                 await self.authentication.run(page)
+                response = await page.goto(one_page, timeout=30000)
+                await self.page_settler.settle(page)
+
+        if self.base_url not in current_url:
+            logging.info(f"Skipping {one_page} due to {self.base_url} check.")
+            return
+
+        if one_page not in self.resumed_pages:
+            self.pages_to_test.append(one_page)
+            self.result_store.stream("pages", one_page)
+
+        validators = await self.collect_page_validators(page, response)
+        self.page_validators[one_page] = validators
+        if self.recrawl_index and self.recrawl_index.is_unchanged(one_page, validators):
+            logging.info(f"{one_page} is unchanged since the previous crawl, reusing its results.")
+            self.reuse_previous_results(page.url)
+            return
+
+        await self.detect_elements(page)
+        logging.info(self.detected_elements)
+        self.stream_new_elements()
+        await self.start_clicking(
+            page, self.username, self.password, self.base_url
+        )
 
-            for index, one_page in enumerate(self.pages_to_visit):
-                if self.should_skip(one_page, self.skip_extensions):
-                    logging.info(f"Skipping {one_page} due to its extension.")
-                    continue
-
-                if any(page_to_avoid in one_page for page_to_avoid in self.avoid_pages):
-                    logging.info(f"Skipping {one_page} due to your requirement.")
-                    continue
-
-                try:
-                    await page.goto(one_page, timeout=30000)
-                    await page.wait_for_load_state("networkidle")
-                except Exception as e:
-                    logging.error(f"Failed to navigate to {one_page}, skipping... Error: {e}")
-                    continue
-
-                current_url = page.url
-                if current_url != one_page:
-                    if self.use_auth:
-                        if index > 1 and index == len(self.pages_to_visit) - 1:
-                            self.pages_to_visit.append(self.base_url)
-                        await self.authentication.run(page)
-                        await page.goto(one_page, timeout=30000)
-                        await page.wait_for_load_state("networkidle")
-
-                if self.base_url not in current_url:
-                    logging.info(f"Skipping {one_page} due to {self.base_url} check.")
-                    continue
-
-                self.pages_to_test.append(one_page)
-
-                self.detected_elements, self.detected_input_elements = (
-                    await self.crawler_helpers.detection_cl_elements(
-                        page, self.detected_elements, self.detected_input_elements
-                    )
-                )
-                logging.info(self.detected_elements)
-                await self.start_clicking(
-                    page, self.username, self.password, self.base_url
-                )
-
-                if self.new_popup_page:
-                    await self.new_popup_page.wait_for_load_state("networkidle")
-                    if self.new_popup_page.url not in self.pages_to_visit:
-                        self.pages_to_visit.append(self.new_popup_page.url)
-                    await self.new_popup_page.close()
-                    self.new_popup_page = None
+    async def detect_elements(self, page):
+        await self.crawler_helpers.detection_cl_elements(
+            page,
+            self.detected_elements,
+            self.detected_input_elements,
+            incremental=self.incremental_detection,
+            template_scope=self.template_scope,
+            include_html=self.element_html,
+            scroll_mode=self.scroll_mode,
+            scroll_budget=self.scroll_budget,
+        )
 
+    async def collect_page_validators(self, page, response):
+        headers = {}
+        if response:
+            try:
+                headers = await response.all_headers()
+            except Exception as e:
+                logging.warning(f"Could not read validators for {page.url}: {e}")
+        try:
+            content = await self.crawler_helpers.normalized_dom(page)
         except Exception as e:
-            logging.error(f"Error during crawling: {e}\n")
-
-        await page.close()
-        crawling_results = {
-            "pages_to_test": self.pages_to_test,
-            "detected_elements": self.detected_elements,
-            "detected_input_elements": self.detected_input_elements,
-            "requests": self.requests,
-            "static_requests": self.static_requests,
-            "responses": self.responses,
-            "static_responses": self.static_responses,
+            logging.warning(f"Could not normalize {page.url} for its digest: {e}")
+            content = await page.content()
+        return {
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "digest": hashlib.sha256(content.encode("utf-8")).hexdigest(),
         }
 
-        return crawling_results
+    def stream_new_elements(self):
+        for kind, elements in (
+            ("detected_elements", self.detected_elements.elements),
+            ("detected_input_elements", self.detected_input_elements.elements),
+        ):
+            for el in elements[self.streamed_elements[kind]:]:
+                self.result_store.stream(kind, el)
+            self.streamed_elements[kind] = len(elements)
+
+    def reuse_previous_results(self, page_url):
+        for el in self.recrawl_index.elements_for(page_url):
+            self.detected_elements.add(el)
+            self.enqueue_element_href(el, self.base_url)
+
+        self.detected_input_elements.extend(self.recrawl_index.input_elements_for(page_url))
+
+        for request_info in self.recrawl_index.requests_for(page_url):
+            template = self.request_key(request_info["url"], request_info["method"], request_info["post_data"])
+            attributed = "inserted_values" in request_info or "inserted_files" in request_info
+            if self.request_templates.add(template, attributed=attributed):
+                request_info["template"] = template
+                self.result_store.add(
+                    "static_requests" if self.should_skip(request_info["url"], self.skip_extensions) else "requests",
+                    request_info,
+                )
+
+        self.stream_new_elements()
 
     async def capture_new_page(self, popup):
-        self.new_popup_page = popup
-        if self.new_popup_page:
-            await self.new_popup_page.wait_for_load_state("networkidle")
-            if self.new_popup_page.url not in self.pages_to_visit:
-                self.pages_to_visit.append(self.new_popup_page.url)
-            await popup.close()
-            self.new_popup_page = None
+        # Handled entirely here, since with several workers a shared attribute
+        # would let one worker close a popup another one is still loading
+        await popup.wait_for_load_state("load")
+        self.enqueue_page(popup.url)
+        await popup.close()
+
+    def record_blocked_resource(self, blocked_info):
+        # Assets repeat on every page, so keep one record per URL
+        blocked_key = (blocked_info["url"], blocked_info["method"])
+        if blocked_key not in self.blocked_resources:
+            self.blocked_resources.add(blocked_key)
+            self.result_store.add("blocked_resources", blocked_info)
 
     async def log_and_continue_response(self, response, domain, encountered_responses):
+        if self.resource_blocker and self.resource_blocker.blocks(response.request):
+            return
         response_domain = urlparse(response.url).netloc
         if response_domain == domain:
             method = response.request.method
@@ -189,65 +483,98 @@ class Crawler:
                     "status": response.status,
                     "headers": headers_dict,
                 }
+                har_content = HarWriter.content(0, headers_dict.get("content-type", ""))
                 if 300 <= response.status < 400:
                     response_info["body"] = "Redirect response"
                     logging.info(f"Redirect response for {response.url}")
                 else:
                     try:
                         content_type = headers_dict.get("content-type", "")
-                        if any(
-                            substring in content_type
-                            for substring in ["text", "json", "application"]
-                        ):
-                            response_info["body"] = await response.text()
-                            logging.info(f"Retrieved text response for {response.url}")
-                        elif (
-                            "image" in content_type
-                            or "audio" in content_type
-                            or "video" in content_type
-                        ):
-                            # FIXED: Better error handling for binary content
-                            try:
-                                binary_data = await response.body()
-                                base64_encoded_data = base64.b64encode(binary_data).decode("utf-8")
-                                response_info["body"] = base64_encoded_data
-                                logging.info(f"Retrieved binary response for {response.url}")
-                            except Exception as binary_error:
-                                logging.warning(f"Could not get binary body for {response.url}: {binary_error}")
-                                response_info["body"] = f"Binary body unavailable: {type(binary_error).__name__}"
+                        content_length = headers_dict.get("content-length", "")
+                        declared_size = int(content_length) if content_length.isdigit() else None
+                        if not self.body_policy.should_fetch(response.status, content_type, declared_size):
+                            # Never read, so it costs neither driver traffic nor memory
+                            response_info.update(self.body_policy.metadata_record(content_type, declared_size))
+                            body = None
+                            har_content = HarWriter.content(
+                                declared_size if declared_size is not None else -1, content_type
+                            )
                         else:
                             try:
-                                response_info["body"] = await response.text()
-                                logging.info(f"Retrieved other text response for {response.url}")
-                            except UnicodeDecodeError:
-                                try:
-                                    binary_data = await response.body()
-                                    response_info["body"] = base64.b64encode(binary_data).decode("utf-8")
-                                    logging.info(f"Retrieved binary response for {response.url} after text decode failure")
-                                except Exception as fallback_error:
-                                    logging.warning(f"Could not get any body for {response.url}: {fallback_error}")
-                                    response_info["body"] = f"Body unavailable: {type(fallback_error).__name__}"
-
-                        # Only search for patterns if we have a valid body string
-                        if isinstance(response_info.get("body"), str) and "unavailable" not in response_info["body"]:
+                                body = await response.body()
+                            except Exception as body_error:
+                                logging.warning(f"Could not get any body for {response.url}: {body_error}")
+                                response_info["body"] = f"Body unavailable: {type(body_error).__name__}"
+                                body = None
+
+                        body_text = None
+                        if body is not None:
+                            body_text = self.record_body(response_info, body, content_type)
+                            if self.har_writer:
+                                har_content = HarWriter.content(
+                                    len(body),
+                                    content_type,
+                                    self.body_policy.kept(body, content_type),
+                                    binary=body_text is None,
+                                )
+                            logging.info(f"Retrieved response body for {response.url}")
+                        # The bytes go out of scope here, only what the policy kept remains
+                        body = None
+
+                        # Searched in full, even when only a prefix of the body is kept
+                        if body_text:
                             f_pattern = re.compile(r"(/[\w/]*(?:bla\.txt|bla\.txt.jpg))")
-                            match_file = f_pattern.findall(response_info["body"])
+                            match_file = f_pattern.findall(body_text)
                             if match_file:
                                 for f_match in match_file:
                                     file_url = urljoin(self.base_url, f_match)
-                                    if file_url not in self.pages_to_visit:
-                                        self.pages_to_visit.append(file_url)
+                                    if self.enqueue_page(file_url):
                                         logging.info(f"Found and added file URL: {file_url}")
                     except Exception as e:
                         logging.error(f"Failed to retrieve response body for {response.url}: {e}")
                         response_info["body"] = f"Failed to retrieve response body: {type(e).__name__}"
 
-                (
-                    self.static_responses.append(json.dumps(response_info))
-                    if self.should_skip(response.url, self.skip_extensions)
-                    else self.responses.append(json.dumps(response_info))
+                self.result_store.add(
+                    "static_responses" if self.should_skip(response.url, self.skip_extensions) else "responses",
+                    response_info,
                 )
                 logging.info(f"Logged response for {response.url}")
+                if self.har_writer:
+                    self.har_writer.response_received(response, headers_dict, har_content)
+            elif self.har_writer:
+                # Repeated responses are not recorded again, but they are still traffic
+                headers = response.headers
+                self.har_writer.response_received(
+                    response, headers, HarWriter.content(-1, headers.get("content-type", ""))
+                )
+
+    def record_body(self, response_info, body, content_type):
+        """Keep what the body policy allows of a body, and return it as text when it is text."""
+        action = self.body_policy.decide(content_type, len(body))
+        if action == "hash":
+            response_info.update(self.body_policy.digest_record(body, content_type))
+            return None
+
+        body_text = self.body_policy.decode(body, content_type)
+        kept = body[: self.body_policy.max_size] if action == "truncate" else body
+        if self.blob_store:
+            # The record keeps only digest, size and type; the bytes go straight to disk
+            response_info.update(self.blob_store.put(kept, content_type))
+        elif body_text is None:
+            response_info["body"] = base64.b64encode(kept).decode("utf-8")
+        elif action == "truncate":
+            response_info["body"] = kept.decode("utf-8", errors="ignore")
+        else:
+            response_info["body"] = body_text
+
+        if action == "truncate":
+            response_info["body_truncated"] = True
+            response_info["body_size"] = len(body)
+        return body_text
+
+    @staticmethod
+    def request_key(url, method, post_data):
+        return request_template(url, method, post_data)
 
     def check_for_password_keys(self, data, user_param_names, password_param_names):
         if len(data) > 5 or len(data) < 2:
@@ -267,36 +594,47 @@ class Crawler:
         page,
         request,
         domain,
-        encountered_urls,
+        request_templates,
         user_param_names,
         password_param_names,
+        page_url=None,
+        filled_snapshot=None,
     ):
         inserted_values = []
         inserted_files = []
         inserted_file_value = ["test file crawler pointer"]
 
         try:
+            if self.resource_blocker and self.resource_blocker.blocks(request):
+                return
             request_domain = urlparse(request.url).netloc
             if request_domain == domain:
-                parsed_url = urlparse(request.url)
-                query_parameters = parsed_url.query
-                parameter_names = [
-                    param.split("=")[0] for param in query_parameters.split("&")
-                ]
+                if self.har_writer:
+                    self.har_writer.request_sent(request)
                 post_data = request.post_data
-                filled_values_list = list(self.filled_values.values())
-
-                url_tuple = (
-                    parsed_url.scheme,
-                    parsed_url.netloc,
-                    parsed_url.path,
-                    request.method,
-                    tuple(parameter_names),
-                    post_data,
-                )
+                filled_values = self.filled_values.get(page, {})
+                if filled_snapshot is None:
+                    filled_snapshot = dict(filled_values)
+                filled_values_list = list(filled_snapshot.values())
+
+                template = self.request_key(request.url, request.method, post_data)
+
+                if self.value_matcher.values != tuple(filled_values_list):
+                    self.value_matcher = ValueMatcher(filled_values_list)
+                inserted_positions = [
+                    {"value": value, "location": location, "start": start, "end": end}
+                    for location, text in (("post_data", post_data), ("url", request.url))
+                    for value, start, end in self.value_matcher.find(text)
+                ]
+                found_values = {position["value"] for position in inserted_positions}
+                for filled_v in filled_values_list:
+                    if filled_v in found_values:
+                        if filled_v.endswith(".txt") or filled_v.endswith(".jpg"):
+                            inserted_files.append(filled_v)
+                        else:
+                            inserted_values.append(filled_v)
 
-                if url_tuple not in encountered_urls:
-                    encountered_urls.add(url_tuple)
+                if request_templates.add(template, attributed=bool(inserted_values or inserted_files)):
 
                     try:
                         all_headers = await request.all_headers()
@@ -330,54 +668,40 @@ class Crawler:
 
                     request_info = {
                         "url": request.url,
-                        "page_url": page.url,
+                        "page_url": page_url or page.url,
                         "method": request.method,
                         "headers": headers_dict,
                         "post_data": post_data,
                         "has_login": has_password,
+                        "template": template,
                     }
 
-                    for filled_v in filled_values_list:
-                        if post_data:
-                            if filled_v in post_data:
-                                if filled_v.endswith(".txt") or filled_v.endswith(
-                                    ".jpg"
-                                ):
-                                    inserted_files.append(filled_v)
-                                else:
-                                    inserted_values.append(filled_v)
-                            elif filled_v in request.url:
-                                if filled_v.endswith(".txt") or filled_v.endswith(
-                                    ".jpg"
-                                ):
-                                    inserted_files.append(filled_v)
-                                else:
-                                    inserted_values.append(filled_v)
-                        else:
-                            if filled_v in request.url:
-                                if filled_v.endswith(".txt") or filled_v.endswith(
-                                    ".jpg"
-                                ):
-                                    inserted_files.append(filled_v)
-                                else:
-                                    inserted_values.append(filled_v)
-
                     if inserted_values:
                         request_info["inserted_values"] = inserted_values
                     elif inserted_files:
                         request_info["inserted_files"] = inserted_files
                         request_info["inserted_file_value"] = inserted_file_value
-                    (
-                        self.static_requests.append(json.dumps(request_info))
-                        if self.should_skip(request.url, self.skip_extensions)
-                        else self.requests.append(json.dumps(request_info))
+                    if inserted_positions:
+                        request_info["inserted_positions"] = inserted_positions
+                    self.result_store.add(
+                        "static_requests" if self.should_skip(request.url, self.skip_extensions) else "requests",
+                        request_info,
                     )
-                    self.filled_values.clear()
+                    # Only what this request saw, values filled in since belong to the next one
+                    for selector, value in filled_snapshot.items():
+                        if filled_values.get(selector) == value:
+                            del filled_values[selector]
         except Exception as e:
             logging.error(f"Error in task: {e}")
 
-    async def process_element(self, page, el, base_url, parent_sel_path=None):
+    async def process_element(self, page, el, base_url, parent_sel_path=None, probe=None):
+        """Click an element if it is still waiting for it, returning whether anything on the page was clicked.
+
+        probe is the element's entry from a batch probe of the page, taken since
+        the last click; without it the element is probed on its own.
+        """
         check_again = True
+        interacted = False
         viewport_size = page.viewport_size
         screen_width = viewport_size["width"]
         screen_height = viewport_size["height"]
@@ -388,71 +712,50 @@ class Crawler:
 
         async def try_click(selector):
             try:
-                test = page.locator(selector)
-                await test.scroll_into_view_if_needed()
-                await asyncio.sleep(0.1)
-                await test.click()
-                await page.wait_for_load_state("networkidle")
-                await asyncio.sleep(0.5)
+                # click() scrolls the element into view itself
+                await page.locator(selector).click()
+                await self.page_settler.settle(page)
                 return True
             except Exception as e:
                 logging.error(f"Error clicking {selector}: {e}")
                 return False
 
-        async def check_and_click(selector):
-            elements = await page.query_selector_all(selector)
-            if len(elements) > 1:
+        async def check_and_click(selector, match_count):
+            if match_count > 1:
                 if "innerHTML" in el and not any(char in el["innerHTML"] for char in ["<", ">"]):
                     selector += f":has-text('{el['innerHTML']}')"
             return await try_click(selector)
 
         try:
             if el["href"].strip() != "":
-                el["clicked"] = "yes"
-                if not el["href"].startswith("#") and el["href"] and not urlparse(el["href"]).scheme:
-                    href = urljoin(el["currentUrl"], el["href"])
-                    if href not in self.pages_to_visit:
-                        self.pages_to_visit.append(href)
-                elif el["href"].startswith(base_url):
-                    if el["href"] not in self.pages_to_visit:
-                        self.pages_to_visit.append(el["href"])
+                self.enqueue_element_href(el, base_url)
             elif el["clicked"] == "no" and el["currentUrl"] == page.url:
-                is_visible = await page.is_visible(selector_path)
-                if not is_visible:
+                await self.capture.throttle()
+                if probe is None:
+                    # Visibility, disabled state and match count in a single round trip
+                    [probe] = await self.crawler_helpers.probe_selectors(page, [selector_path], enable_disabled=True)
+                is_disabled = probe["disabled"]
+                if not probe["visible"]:
                     if parent_sel_path is not None:
+                        interacted = True
                         parent = page.locator(parent_sel_path)
-                        await parent.scroll_into_view_if_needed()
-                        await asyncio.sleep(0.1)
                         try:
                             await parent.click()
-                            await page.wait_for_load_state("networkidle")
-                            await asyncio.sleep(0.5)
+                            await self.page_settler.settle(page)
                         except TimeoutError:
                             logging.error(f"Element {parent_sel_path} click timed out, moving on.")
-                    await asyncio.sleep(0.1)
+                        [probe] = await self.crawler_helpers.probe_selectors(page, [selector_path], enable_disabled=True)
+                        is_disabled = is_disabled or probe["disabled"]
                     selector_path = el["selectorPath"]
 
-                is_disabled = await page.eval_on_selector(
-                    selector_path,
-                    """
-                        element => {
-                            let parent = element.parentElement;
-                            if (parent && parent.classList.contains('disabled')) {
-                                parent.classList.remove('disabled');
-                                return true;
-                            }
-                            return false;
-                        }
-                    """
-                )
-
-                is_visible = await page.is_visible(selector_path)
-                if is_visible:
-                    await asyncio.sleep(0.1)
+                if not probe["count"]:
+                    raise LookupError(f"No element matches {selector_path}")
 
+                if probe["visible"]:
                     if not is_disabled:
-                        if not await check_and_click(selector_path):
-                            if not await check_and_click(el["selectorPath"]):
+                        interacted = True
+                        if not await check_and_click(selector_path, probe["count"]):
+                            if not await check_and_click(el["selectorPath"], probe["count"]):
                                 logging.error(f"Failed to click element with selector: {selector_path}")
                                 await page.mouse.click(center_x, center_y)
                                 el["clicked"] = "yes"
@@ -463,58 +766,40 @@ class Crawler:
 
                     if not check_again:
                         el["clicked"] = "yes"
-                        await page.wait_for_load_state("networkidle")
+                        await self.page_settler.settle(page)
                         while page.url != el["currentUrl"]:
-                            if page.url not in self.pages_to_visit and "#" not in page.url:
-                                self.pages_to_visit.append(page.url)
+                            if "#" not in page.url:
+                                self.enqueue_page(page.url)
                             await page.goto(el["currentUrl"], timeout=30000)
-                            await page.wait_for_load_state("networkidle")
+                            await self.page_settler.settle(page)
                             if page.url == el["currentUrl"]:
-                                self.detected_elements, self.detected_input_elements = await self.crawler_helpers.detection_cl_elements(
-                                    page, self.detected_elements, self.detected_input_elements
-                                )
+                                await self.detect_elements(page)
                                 logging.info(f"second: {self.detected_elements}")
                             elif page.url != el["currentUrl"]:
                                 await self.authentication.run(page)
                                 await page.goto(el["currentUrl"], timeout=30000)
-                                await page.wait_for_load_state("networkidle")
-                                self.detected_elements, self.detected_input_elements = await self.crawler_helpers.detection_cl_elements(
-                                    page, self.detected_elements, self.detected_input_elements
-                                )
+                                await self.page_settler.settle(page)
+                                await self.detect_elements(page)
                                 logging.info(f"third: {self.detected_elements}")
-                        await asyncio.sleep(0.1)
-                        await page.wait_for_load_state("networkidle")
-                        updated_elements = await page.evaluate("window.detected_elements")
-                        updated_input_elements = await page.evaluate("window.detected_input_elements")
-
-                        new_elements = [
-                            el for el in updated_input_elements
-                            if el["hash"] not in {el["hash"] for el in self.detected_input_elements}
-                        ]
+                        await self.page_settler.settle(page)
+                        # Only what was detected since the last export, and in incremental
+                        # mode only what the click added or changed
+                        updated_elements, updated_input_elements = await self.crawler_helpers.export_detected(
+                            page,
+                            self.element_html,
+                            delta_level=el.get("level", 0) + 1 if self.incremental_detection else None,
+                        )
 
-                        self.detected_input_elements.extend(new_elements)
+                        self.detected_input_elements.extend(updated_input_elements)
 
-                        different_elements_by_hash = []
+                        # Elements revealed by the click count as new per parent, not per hash
                         for element in updated_elements:
                             if "parentElement" in element:
-                                has_matching_elements = any(
-                                    "hash" in e and "parentElement" in e
-                                    for e in self.detected_elements
-                                )
-                                if has_matching_elements:
-                                    detected_element_pairs = {
-                                        (e.get("hash"), e.get("parentElement", {}).get("hash"))
-                                        for e in self.detected_elements
-                                    }
-                                    if (
-                                        element.get("hash"),
-                                        element.get("parentElement", {}).get("hash")
-                                    ) not in detected_element_pairs:
-                                        different_elements_by_hash.append(element)
-                                else:
-                                    different_elements_by_hash.append(element)
-
-                        self.detected_elements.extend(different_elements_by_hash)
+                                self.detected_elements.add_under_parent(element)
+                            else:
+                                # Found by the interval scroll since the page's first export
+                                self.detected_elements.add(element)
+                        self.stream_new_elements()
                         await self.process_children(page, el)
                 else:
                     logging.info(f"Element {el['className']} - {el['selectorPath']}: is not visible!")
@@ -523,8 +808,40 @@ class Crawler:
             logging.error(f"Simulate a click in the bottom-right corner of the screen because of error: {e}")
             await page.mouse.click(center_x, center_y)
             el["clicked"] = "yes"
+            interacted = True
 
+        return interacted
 
+    @staticmethod
+    def awaiting_click(page, el, above_level=None):
+        if above_level is not None and (el.get("level") is None or el["level"] <= above_level):
+            return False
+        return (
+            not (el.get("href") or "").strip()
+            and el.get("clicked") == "no"
+            and el.get("currentUrl") == page.url
+            and bool(el.get("selectorPath"))
+        )
+
+    async def probe_awaiting_click(self, page, above_level=None):
+        """Probe every detected element still waiting to be clicked on this page in one round trip."""
+        selectors = list(
+            dict.fromkeys(
+                el["selectorPath"] for el in self.detected_elements if self.awaiting_click(page, el, above_level)
+            )
+        )
+        probes = await self.crawler_helpers.probe_selectors(page, selectors, enable_disabled=True)
+        return dict(zip(selectors, probes))
+
+
+    def enqueue_element_href(self, el, base_url):
+        if el["href"].strip() == "":
+            return
+        el["clicked"] = "yes"
+        if not el["href"].startswith("#") and not urlparse(el["href"]).scheme:
+            self.enqueue_page(urljoin(el["currentUrl"], el["href"]))
+        elif el["href"].startswith(base_url):
+            self.enqueue_page(el["href"])
 
     async def process_input_element(self, page, el, username, password):
         viewport_size = page.viewport_size
@@ -533,6 +850,8 @@ class Crawler:
         center_x = screen_width // 2
         center_y = screen_height // 2
         form_clicked = False
+        # Keyed by page so concurrent workers never consume each other's values.
+        filled_values = self.filled_values.setdefault(page, {})
 
         if (
             "type" in el
@@ -541,17 +860,19 @@ class Crawler:
             and el["currentUrl"] == page.url
         ):
 
-            async def find_element_by_inner_html(page, tag_name, inner_html):
-                try:
-                    elements = await page.query_selector_all(tag_name)
-                    for element in elements:
-                        if await element.inner_html() == inner_html:
+            async def find_input_set(page, el):
+                # The detection script stamps every input set container with its hash,
+                # the selector path is only a fallback for pages scanned before that.
+                for selector in (f'[data-crawler-input-set="{el["hash"]}"]', el["selectorPath"]):
+                    try:
+                        element = await page.query_selector(selector)
+                        if element:
                             return element
-                except Exception as e:
-                    logging.error(f"Error while searching for element: {e}")
+                    except Exception as e:
+                        logging.error(f"Error while searching for element: {e}")
                 return None
 
-            form_element = await find_element_by_inner_html(page, el["tagName"], el["innerHTML"])
+            form_element = await find_input_set(page, el)
 
             if form_element:
                 is_hidden = await page.evaluate(
@@ -573,26 +894,26 @@ class Crawler:
                 pass
 
             try:
-                for input_el in el["inputs"]:
-                    selector_str = input_el.get("selectorPath")
-
-                    is_visible = await page.is_visible(selector_str)
-                    if not is_visible:
-                        if el.get("parentHash") is not None:
-                            for parent_el in self.detected_elements:
-                                if parent_el.get("hash") == el.get("parentHash"):
-                                    get_par_sel_path = parent_el.get("selectorPath")
-                                    find_parent = page.locator(get_par_sel_path)
-                                    await find_parent.scroll_into_view_if_needed()
-                                    await asyncio.sleep(0.1)
-                                    try:
-                                        await find_parent.click()
-                                        await page.wait_for_load_state("networkidle")
-                                        await asyncio.sleep(0.5)
-                                    except TimeoutError:
-                                        logging.error(f"Element {get_par_sel_path} click timed out, moving on.")
-                                    await asyncio.sleep(0.1)
+                # Probe the whole set in one round trip instead of one per input
+                input_selectors = [input_el.get("selectorPath") for input_el in el["inputs"]]
+                probes = await self.crawler_helpers.probe_selectors(page, input_selectors)
+                if not all(
+                    probe["visible"] for input_el, probe in zip(el["inputs"], probes) if input_el.get("type") != "hidden"
+                ):
+                    # Open the element that revealed the set once, clicking it per input could close it again
+                    parent_el = self.detected_elements.get(el.get("parentHash"))
+                    if el.get("parentHash") is not None and parent_el:
+                        get_par_sel_path = parent_el.get("selectorPath")
+                        find_parent = page.locator(get_par_sel_path)
+                        try:
+                            await find_parent.click()
+                            await self.page_settler.settle(page)
+                        except TimeoutError:
+                            logging.error(f"Element {get_par_sel_path} click timed out, moving on.")
+                probes = await self.crawler_helpers.probe_selectors(page, input_selectors, unhide=True)
 
+                for input_el, probe in zip(el["inputs"], probes):
+                    selector_str = input_el.get("selectorPath")
                     input_type = input_el.get("type")
                     input_name = input_el.get("name") if input_el.get("name") is not None else "nema"
                     input_id = input_el.get("id") if input_el.get("id") is not None else "nema"
@@ -603,35 +924,8 @@ class Crawler:
                     tag_name = input_el.get("tagName")
                     selector_str = input_el.get("selectorPath")
                     selector = page.locator(selector_str)
-                    is_hidden = await page.eval_on_selector(
-                        selector_str,
-                        """
-                        element => {
-                            if (getComputedStyle(element).display === "none" || getComputedStyle(element).display === "none !important") {
-                                element.style.display = "block";
-                                return true;
-                            }
-                            return false;
-                        }
-                        """,
-                    )
-                    await page.eval_on_selector(
-                        selector_str,
-                        """
-                        element => {
-                            if (element) {
-                                element.removeAttribute('hidden');
-                                return true;
-                            }
-                            return false;
-                        }
-                        """,
-                    )
-
-                    if is_hidden:
-                        pass
-                    await selector.scroll_into_view_if_needed()
-                    await asyncio.sleep(0.1)
+                    if not probe["count"]:
+                        raise LookupError(f"No element matches {selector_str}")
 
                     if (
                         input_type == "text"
@@ -640,8 +934,7 @@ class Crawler:
                     ):
                         if input_type not in ["submit", "button"]:
                             await page.fill(selector_str, "https://pastebin.com/raw/sBPFirne")
-                        self.filled_values[selector_str] = "https://pastebin.com/raw/sBPFirne"
-                        await asyncio.sleep(0.1)
+                        filled_values[selector_str] = "https://pastebin.com/raw/sBPFirne"
                     elif (
                         "email" in input_type
                         or "email" in input_name
@@ -657,8 +950,7 @@ class Crawler:
                             await page.fill(selector_str, email)
                         else:
                             await selector.click()
-                        self.filled_values[selector_str] = email
-                        await asyncio.sleep(0.1)
+                        filled_values[selector_str] = email
                     elif (
                         "password" in input_type
                         or "password" in input_name
@@ -667,8 +959,7 @@ class Crawler:
                     ):
                         if input_type not in ["submit", "button"]:
                             await page.fill(selector_str, password)
-                        self.filled_values[selector_str] = password
-                        await asyncio.sleep(0.1)
+                        filled_values[selector_str] = password
                     elif (
                         "number" in input_type
                         or "number" in input_name
@@ -678,45 +969,40 @@ class Crawler:
                         random_num = self.common_helpers.random_token(5)
                         if input_type not in ["submit", "button"]:
                             await page.fill(selector_str, random_num)
-                        self.filled_values[selector_str] = random_num
-                        await asyncio.sleep(0.1)
+                        filled_values[selector_str] = random_num
                     elif input_type == "text":
                         random_text = self.common_helpers.random_string()
                         if input_type not in ["submit", "button"]:
                             await page.fill(selector_str, random_text)
-                        self.filled_values[selector_str] = random_text
-                        await asyncio.sleep(0.1)
+                        filled_values[selector_str] = random_text
                     elif tag_name == "TEXTAREA":
                         random_text = self.common_helpers.random_string()
                         await page.fill(selector_str, random_text)
-                        self.filled_values[selector_str] = random_text
-                        await asyncio.sleep(0.1)
+                        filled_values[selector_str] = random_text
                     elif input_type == "file":
                         if "image" in input_accept:
                             try:
                                 await selector.set_input_files("app/common/assets/images/bla.txt.jpg")
-                                self.filled_values[selector] = "bla.txt.jpg"
+                                filled_values[selector] = "bla.txt.jpg"
                             except Exception as e:
                                 logging.error(f"Failed to upload bla.txt.jpg due to: {e}. Trying bla.txt.jpg...")
                         else:
                             try:
                                 await selector.set_input_files("app/common/assets/documents/bla.txt")
-                                self.filled_values[selector] = "bla.txt"
+                                filled_values[selector] = "bla.txt"
                             except Exception as e:
                                 logging.error(f"Failed to upload bla.txt due to: {e}. Trying bla.txt...")
                     elif input_type == "file":
                         if "video" in input_accept:
                             try:
                                 await selector.set_input_files("app/common/assets/videos/hackU.mp4")
-                                self.filled_values[selector] = "hackU.mp4"
+                                filled_values[selector] = "hackU.mp4"
                             except Exception as e:
                                 logging.error(f"Failed to upload hackU.mp4 due to: {e}....")
                     elif input_type == "submit" or (tag_name == "BUTTON" and input_type == "submit"):
-                        await asyncio.sleep(0.1)
                         try:
                             await selector.click()
-                            await page.wait_for_load_state("networkidle")
-                            await asyncio.sleep(0.5)
+                            await self.page_settler.settle(page)
                             form_clicked = True
                         except TimeoutError:
                             logging.error(f"Element click timed out, moving on.")
@@ -724,37 +1010,30 @@ class Crawler:
                         logging.info(f"Element not detected.")
 
                     if form_clicked:
-                        await page.wait_for_load_state("networkidle")
+                        await self.page_settler.settle(page)
                         await page.mouse.click(center_x, center_y)
                         while page.url != el["currentUrl"]:
-                            if page.url not in self.pages_to_visit and "#" not in page.url:
-                                self.pages_to_visit.append(page.url)
+                            if "#" not in page.url and self.enqueue_page(page.url):
                                 await page.goto(el["currentUrl"], timeout=30000)
-                                await page.wait_for_load_state("networkidle")
+                                await self.page_settler.settle(page)
                             if page.url == el["currentUrl"]:
-                                self.detected_elements, self.detected_input_elements = await self.crawler_helpers.detection_cl_elements(
-                                    page, self.detected_elements, self.detected_input_elements
-                                )
+                                await self.detect_elements(page)
                                 logging.info(f"fourth: {self.detected_elements}")
                             elif page.url != el["currentUrl"]:
                                 await self.authentication.run(page)
                                 await page.goto(el["currentUrl"], timeout=30000)
-                                await page.wait_for_load_state("networkidle")
-                                self.detected_elements, self.detected_input_elements = await self.crawler_helpers.detection_cl_elements(
-                                    page, self.detected_elements, self.detected_input_elements
-                                )
+                                await self.page_settler.settle(page)
+                                await self.detect_elements(page)
                                 logging.info(f"fifth: {self.detected_elements}")
-                        await asyncio.sleep(0.1)
-                        await page.wait_for_load_state("networkidle")
+                        await self.page_settler.settle(page)
                         await page.goto(el["currentUrl"], timeout=30000)
-                        self.detected_elements, self.detected_input_elements = await self.crawler_helpers.detection_cl_elements(
-                            page, self.detected_elements, self.detected_input_elements
-                        )
+                        await self.detect_elements(page)
                         logging.info(f"sixth: {self.detected_elements}")
                     else:
                         logging.info("Form is not submitted!")
 
                 el["isFilled"] = "yes"
+                self.stream_new_elements()
             except Exception as e:
                 logging.error(f"Error while filling form on page: {page.url} with selector: {selector_str} --- {e}")
 
@@ -772,6 +1051,7 @@ class Crawler:
         parent_level = parent_element.get("level")
         parent_hash_origin = parent_element.get("hash")
         if parent_level is not None:
+            probes = {}  # Selector path -> probe, taken since the last click
             for child in self.detected_elements:
                 child_level = child.get("level")
                 parent_hash = child.get("parentElement", {}).get("hash")
@@ -780,7 +1060,13 @@ class Crawler:
                 else:
                     parent_sel_path = None
                 if child_level is not None and child_level > parent_level:
-                    await self.process_element(page, child, self.base_url, parent_sel_path)
+                    if self.awaiting_click(page, child) and child["selectorPath"] not in probes:
+                        probes = await self.probe_awaiting_click(page, parent_level)
+                    if await self.process_element(
+                        page, child, self.base_url, parent_sel_path, probes.get(child.get("selectorPath"))
+                    ):
+                        # The click may have changed any other child, so probe again before the next one
+                        probes = {}
 
     async def start_clicking(self, page, username, password, base_url):
         if len(self.detected_input_elements) > 0:
@@ -793,8 +1079,13 @@ class Crawler:
                             if "#" + element.get("forAttribute") == input_el["selectorPath"]:
                                 element["clicked"] = "yes"
 
+        probes = {}  # Selector path -> probe, taken since the last click
         for el in self.detected_elements:
-            await self.process_element(page, el, base_url)
+            if self.awaiting_click(page, el) and el["selectorPath"] not in probes:
+                probes = await self.probe_awaiting_click(page)
+            if await self.process_element(page, el, base_url, probe=probes.get(el.get("selectorPath"))):
+                # The click may have changed any other element, so probe again before the next one
+                probes = {}
 
         for el in self.detected_input_elements:
             await self.process_input_element(page, el, username, password)
@@ -0,0 +1,126 @@
+import heapq
+import re
+from collections import deque
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+
+class Frontier:
+    ORDERS = ("bfs", "dfs", "novelty")
+    DEFAULT_PORTS = {"http": 80, "https": 443}
+    ROUTE_FRAGMENTS = ("/", "!")
+    ID_SEGMENT = re.compile(r"^(?:\d+|[0-9a-f]{8,}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})$", re.IGNORECASE)
+
+    def __init__(self, urls=(), order="bfs"):
+        if order not in self.ORDERS:
+            raise ValueError(f"Invalid frontier order '{order}'. Choose one of: {', '.join(self.ORDERS)}.")
+        self.order = order
+        self.seen = {}  # Canonical URL -> URL as first discovered, in discovery order
+        self.pending = [] if order == "novelty" else deque()
+        self.shape_counts = {}
+        self.sequence = 0
+
+        for url in urls:
+            self.add(url)
+
+    @classmethod
+    def canonicalize(cls, url):
+        """Normalize a URL so trivially different spellings share one frontier entry."""
+        parsed = urlparse(url.strip())
+        try:
+            port = parsed.port
+        except ValueError:
+            return url.strip()
+        scheme = parsed.scheme.lower()
+        host = (parsed.hostname or "").lower()
+        if ":" in host:
+            host = f"[{host}]"
+        netloc = host
+        if port and port != cls.DEFAULT_PORTS.get(scheme):
+            netloc = f"{host}:{port}"
+        if parsed.username:
+            userinfo = parsed.username + (f":{parsed.password}" if parsed.password else "")
+            netloc = f"{userinfo}@{netloc}"
+        query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+        # Plain anchors point into the same document, but hash routes such as
+        # #/about or #!/cart are separate pages of a single page app
+        fragment = parsed.fragment if parsed.fragment.startswith(cls.ROUTE_FRAGMENTS) else ""
+        return urlunparse((scheme, netloc, parsed.path or "/", parsed.params, query, fragment))
+
+    @classmethod
+    def path_shape(cls, url):
+        """The URL's path with ID-like segments masked, shared with the request templates."""
+        segments = urlparse(url).path.split("/")
+        return "/".join("{id}" if cls.ID_SEGMENT.match(segment) else segment for segment in segments)
+
+    def add(self, url):
+        key = self.canonicalize(url)
+        if key in self.seen:
+            return False
+        self.seen[key] = url
+        self.push(url)
+        return True
+
+    def requeue(self, url):
+        """Schedule a URL again even if it was already visited."""
+        self.seen.setdefault(self.canonicalize(url), url)
+        self.push(url)
+
+    def push(self, url):
+        if self.order == "novelty":
+            # Pages whose path shape was seen least often go first, so the
+            # crawl reaches new sections before paging through /item/1..N.
+            shape = self.path_shape(url)
+            priority = self.shape_counts.get(shape, 0)
+            self.shape_counts[shape] = priority + 1
+            heapq.heappush(self.pending, (priority, self.sequence, url))
+            self.sequence += 1
+        else:
+            self.pending.append(url)
+
+    def pop(self):
+        if not self.pending:
+            return None
+        if self.order == "novelty":
+            return heapq.heappop(self.pending)[2]
+        if self.order == "dfs":
+            return self.pending.pop()
+        return self.pending.popleft()
+
+    def to_state(self, in_flight=()):
+        """Serializable frontier state; in-flight pages are scheduled again first."""
+        if self.order == "novelty":
+            pending = [[-1, -1, url] for url in in_flight] + [list(entry) for entry in self.pending]
+        elif self.order == "dfs":
+            pending = list(self.pending) + list(in_flight)
+        else:
+            pending = list(in_flight) + list(self.pending)
+        return {
+            "order": self.order,
+            "seen": list(self.seen.items()),
+            "pending": pending,
+            "shape_counts": self.shape_counts,
+            "sequence": self.sequence,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        frontier = cls(order=state["order"])
+        frontier.seen = dict(state["seen"])
+        frontier.shape_counts = state["shape_counts"]
+        frontier.sequence = state["sequence"]
+        if frontier.order == "novelty":
+            frontier.pending = [tuple(entry) for entry in state["pending"]]
+            heapq.heapify(frontier.pending)
+        else:
+            frontier.pending = deque(state["pending"])
+        return frontier
+
+    @property
+    def pending_count(self):
+        return len(self.pending)
+
+    def seen_urls(self):
+        return list(self.seen.values())
+
+    def __contains__(self, url):
+        return self.canonicalize(url) in self.seen
@@ -0,0 +1,227 @@
+import base64
+import json
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlparse
+
+ENTRIES_KEY = re.compile(r'(?<!\\)"entries"\s*:\s*\[')
+HAR_HEADER = ('{"log": {"version": "1.2", "creator": {"name": "Crawler", "version": "1.0"}, '
+              '"pages": [], "entries": [\n')
+
+
+def header_list(headers):
+    return [{"name": name, "value": value} for name, value in headers.items() if not name.startswith(":")]
+
+
+class HarWriter:
+    """Streams captured traffic to a HAR 1.2 file, one entry per finished exchange.
+
+    A request waits here only until its response arrives; the entry is then
+    appended to the file and forgotten, so the HAR never sits in memory.
+    With append, a HAR left by an earlier run of the crawl is reopened and its
+    entries are continued instead of overwritten.
+    """
+
+    def __init__(self, path, append=False):
+        entries_end = self.entries_end(path) if append else None
+        if entries_end is None:
+            self.file = open(path, "w", buffering=1)
+            self.file.write(HAR_HEADER)
+            self.entry_count = 0
+        else:
+            with open(path, "r+b") as file:
+                file.truncate(entries_end)
+                file.seek(max(entries_end - 2, 0))
+                has_entries = file.read() != b"[\n"
+            self.file = open(path, "a", buffering=1)
+            # Only decides whether the next entry needs a comma before it
+            self.entry_count = int(has_entries)
+        self.pending = {}  # Request -> request half of its entry
+
+    @staticmethod
+    def entries_end(path, chunk_size=1 << 16):
+        """Where the entries of an existing HAR end, or None when there is nothing to continue.
+
+        That is right before the closing brackets of a HAR that was closed, or
+        right after the last complete line of one whose crawl was killed.
+        Every entry is written on a line of its own, so a cut off entry is dropped.
+        """
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        with file:
+            position = file.seek(0, os.SEEK_END)
+            file.seek(max(position - 16, 0))
+            tail = file.read()
+            stripped = tail.rstrip()
+            if stripped.endswith(b"]}}"):
+                position += len(stripped) - len(tail) - 3
+            while position > 0:
+                read_from = max(position - chunk_size, 0)
+                file.seek(read_from)
+                newline = file.read(position - read_from).rfind(b"\n")
+                if newline >= 0:
+                    return read_from + newline + 1
+                position = read_from
+        # Not even the header was written completely
+        return None
+
+    @staticmethod
+    def request_entry(request):
+        headers = request.headers
+        post_data = request.post_data
+        entry = {
+            "method": request.method,
+            "url": request.url,
+            "httpVersion": "",
+            "cookies": [],
+            "headers": header_list(headers),
+            "queryString": [
+                {"name": name, "value": value}
+                for name, value in parse_qsl(urlparse(request.url).query, keep_blank_values=True)
+            ],
+            "headersSize": -1,
+            "bodySize": len(post_data.encode("utf-8")) if post_data else 0,
+        }
+        if post_data:
+            entry["postData"] = {"mimeType": headers.get("content-type", ""), "text": post_data}
+        return entry
+
+    @staticmethod
+    def content(size, mime_type, body=None, binary=False):
+        """The content object for a response body, with the body itself only if it was kept."""
+        content = {"size": size, "mimeType": mime_type}
+        if body is not None:
+            content["text"] = base64.b64encode(body).decode("utf-8") if binary else body.decode("utf-8", errors="ignore")
+            if binary:
+                content["encoding"] = "base64"
+        return content
+
+    @staticmethod
+    def timings(timing):
+        """HAR timings from Playwright's, which are in ms relative to the request's start and -1 when unknown."""
+        def span(start, end):
+            start, end = timing.get(start, -1), timing.get(end, -1)
+            return end - start if start >= 0 and end >= start else -1
+
+        timings = {
+            "blocked": -1,
+            "dns": span("domainLookupStart", "domainLookupEnd"),
+            "connect": span("connectStart", "connectEnd"),
+            "ssl": span("secureConnectionStart", "connectEnd"),
+            "send": 0,
+            "wait": max(span("requestStart", "responseStart"), 0),
+            "receive": max(span("responseStart", "responseEnd"), 0),
+        }
+        # ssl is already part of connect
+        total = sum(value for name, value in timings.items() if name != "ssl" and value > 0)
+        return timings, total
+
+    def request_sent(self, request):
+        self.pending[request] = self.request_entry(request)
+
+    def response_received(self, response, headers, content):
+        request = response.request
+        request_entry = self.pending.pop(request, None) or self.request_entry(request)
+        try:
+            timing = request.timing
+        except Exception:
+            timing = {}
+        timings, total = self.timings(timing)
+        start_time = timing.get("startTime", -1)
+        started = datetime.fromtimestamp(start_time / 1000, timezone.utc) if start_time > 0 else datetime.now(timezone.utc)
+        self.append(
+            {
+                "startedDateTime": started.isoformat(),
+                "time": total,
+                "request": request_entry,
+                "response": {
+                    "status": response.status,
+                    "statusText": response.status_text,
+                    "httpVersion": "",
+                    "cookies": [],
+                    "headers": header_list(headers),
+                    "content": content,
+                    "redirectURL": headers.get("location", ""),
+                    "headersSize": -1,
+                    "bodySize": -1,
+                },
+                "cache": {},
+                "timings": timings,
+            }
+        )
+
+    def append(self, entry):
+        self.file.write(("," if self.entry_count else "") + json.dumps(entry) + "\n")
+        self.entry_count += 1
+
+    def close(self):
+        # Requests that never got a response, e.g. aborted ones, are kept with status 0
+        for request_entry in self.pending.values():
+            self.append(
+                {
+                    "startedDateTime": datetime.now(timezone.utc).isoformat(),
+                    "time": 0,
+                    "request": request_entry,
+                    "response": {
+                        "status": 0,
+                        "statusText": "",
+                        "httpVersion": "",
+                        "cookies": [],
+                        "headers": [],
+                        "content": {"size": 0, "mimeType": ""},
+                        "redirectURL": "",
+                        "headersSize": -1,
+                        "bodySize": -1,
+                    },
+                    "cache": {},
+                    "timings": {"send": 0, "wait": 0, "receive": 0},
+                }
+            )
+        self.pending = {}
+        self.file.write("]}}\n")
+        self.file.close()
+
+
+def iter_har_entries(path, chunk_size=1 << 20):
+    """Yield the entries of a HAR file one at a time, without loading the whole file.
+
+    A file that ends early, such as one from a crawl that was killed, yields
+    the entries it has.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8-sig") as file:
+        buffer = ""
+        while True:
+            match = ENTRIES_KEY.search(buffer)
+            if match:
+                break
+            chunk = file.read(chunk_size)
+            if not chunk:
+                logging.warning(f"No entries found in {path}")
+                return
+            # The key may be split across two chunks
+            buffer = buffer[-64:] + chunk
+
+        position = match.end()
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                if position == len(buffer):
+                    raise json.JSONDecodeError("Buffer exhausted", buffer, position)
+                entry, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Reading at least as much again keeps huge entries to a few attempts
+                chunk = file.read(max(chunk_size, len(buffer) - position))
+                if not chunk:
+                    logging.warning(f"{path} ends before its entries do, using the entries read so far")
+                    return
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+            yield entry
@@ -1,37 +1,179 @@
-import asyncio
+import logging
 
 class CrawlerHelpers:
-    async def detection_cl_elements(page, elements_from_crawler, input_elements_from_crawler):
+    EXPORT_DETECTED = """
+    ([cursor, includeHtml, deltaLevel]) => {
+        if (!window.exportDetected) return null;
+        if (deltaLevel !== null) window.collectDetectionDelta(deltaLevel);
+        return window.exportDetected(cursor, includeHtml);
+    }
+    """
+
+    PROBE_SELECTORS = """
+    ([selectors, options]) => selectors.map(selector => {
+        let matches = [];
+        try {
+            matches = document.querySelectorAll(selector);
+        } catch (e) {}
+        const element = matches[0];
+        if (!element) {
+            return { selector: selector, count: 0, visible: false, disabled: false };
+        }
+
+        let disabled = false;
+        const parent = element.parentElement;
+        if (options.enableDisabled && parent && parent.classList.contains('disabled')) {
+            parent.classList.remove('disabled');
+            disabled = true;
+        }
+        if (options.unhide) {
+            if (getComputedStyle(element).display === 'none') {
+                element.style.display = 'block';
+            }
+            element.removeAttribute('hidden');
+        }
+
+        const rect = element.getBoundingClientRect();
+        return {
+            selector: selector,
+            count: matches.length,
+            visible: rect.width > 0 && rect.height > 0 && getComputedStyle(element).visibility !== 'hidden',
+            disabled: disabled
+        };
+    })
+    """
+
+    NORMALIZED_DOM = """
+    () => {
+        const root = document.documentElement.cloneNode(true);
+        root.querySelectorAll('script, noscript').forEach(element => { element.textContent = ''; });
+        root.querySelectorAll('input[type="hidden" i]').forEach(element => element.removeAttribute('value'));
+        root.querySelectorAll('meta[name]').forEach(element => {
+            if (/csrf|xsrf|token|nonce/i.test(element.name)) element.removeAttribute('content');
+        });
+        for (const element of root.querySelectorAll('*')) {
+            for (const attribute of Array.from(element.attributes)) {
+                if (/^(nonce|integrity)$|csrf|xsrf|token/i.test(attribute.name)) {
+                    element.removeAttribute(attribute.name);
+                }
+            }
+        }
+        return root.outerHTML;
+    }
+    """
+
+    def __init__(self):
+        self.export_cursors = {}  # Page -> where its last export stopped
+
+    async def detection_cl_elements(
+        self,
+        page,
+        elements_from_crawler,
+        input_elements_from_crawler,
+        incremental=False,
+        template_scope="page",
+        include_html=False,
+        scroll_mode="interval",
+        scroll_budget=30,
+    ):
         script = """
-        (function() {
+        (function(options) {
+            var incremental = options.incremental;
+            var templateScope = options.templateScope;
+            var scrollBudget = options.scrollBudget; // Most viewport-sized scroll steps per scan
             var colors = ["blue", "red", "green", "black", "orange", "yellow", "indigo", "violet", "pink", "brown", "black", "gray", "white"]; // add more colors if needed
             var levelCounts = {}; // Object to hold counts of elements at each level
-            window.detected_elements = []; // Initialize detected_elements array on the window object
+            // Arrays are the export view read from Python; the maps index them by hash
+            // so duplicate and parent lookups do not rescan everything found so far.
+            window.detected_elements = [];
             window.detected_input_elements = [];
+            window.detected_elements_by_hash = new Map();
+            window.detected_input_elements_by_hash = new Map();
+
+            function storeDetected(list, index, info) {
+                if (index.has(info.hash)) return false;
+                index.set(info.hash, info);
+                list.push(info);
+                return true;
+            }
+
+            // Selector lookups are cached for one synchronous detection pass, during
+            // which the page cannot change the DOM. Passes start from the functions
+            // wrapped below; nested calls share the outer pass's cache.
+            var selectorCache = null;
+
+            function withSelectorCache(fn) {
+                return function() {
+                    if (selectorCache) return fn.apply(this, arguments);
+                    selectorCache = {
+                        classCounts: new Map(), // class selector -> number of matching elements
+                        positions: new WeakMap(), // element -> nth-child position
+                        chains: new WeakMap(), // element -> nth-child chain up to below body
+                        paths: new WeakMap() // element -> generated selector path
+                    };
+                    try {
+                        return fn.apply(this, arguments);
+                    } finally {
+                        selectorCache = null;
+                    }
+                };
+            }
+
+            function classSelectorCount(classSelector) {
+                var count = selectorCache.classCounts.get(classSelector);
+                if (count === undefined) {
+                    count = document.querySelectorAll(classSelector).length;
+                    selectorCache.classCounts.set(classSelector, count);
+                }
+                return count;
+            }
+
+            function nthChild(element) {
+                var position = selectorCache.positions.get(element);
+                if (position === undefined) {
+                    // Number all siblings at once, they are usually asked for next
+                    var siblings = element.parentElement ? element.parentElement.children : [element];
+                    for (var i = 0; i < siblings.length; i++) {
+                        selectorCache.positions.set(siblings[i], i + 1);
+                    }
+                    position = selectorCache.positions.get(element);
+                }
+                return position;
+            }
+
+            function nthChildChain(element) {
+                var chain = selectorCache.chains.get(element);
+                if (chain === undefined) {
+                    var parent = element.parentElement;
+                    chain = `${element.tagName.toLowerCase()}:nth-child(${nthChild(element)})`;
+                    if (parent && parent.parentNode && parent.tagName.toLowerCase() !== 'body' && !element.id) {
+                        chain = nthChildChain(parent) + ' > ' + chain;
+                    }
+                    selectorCache.chains.set(element, chain);
+                }
+                return chain;
+            }
 
             function generateSelectorPath(element) {
                 if (!element || !element.tagName) return '';
+                var path = selectorCache.paths.get(element);
+                if (path === undefined) {
+                    path = buildSelectorPath(element);
+                    selectorCache.paths.set(element, path);
+                }
+                return path;
+            }
+
+            function buildSelectorPath(element) {
                 const tagName = element.tagName.toLowerCase();
                 if (['body', 'html'].includes(tagName)) return tagName;
                 if (element.id) return '#' + element.id;
                 if (element.style.display === 'none' || element.style.visibility === 'hidden') return '';
                 if (element.parentElement.tagName.toLowerCase() === 'body') return tagName;
                 const classSelector = [...element.classList].map(className => '.' + className).join('');
-                if (classSelector && document.querySelectorAll(classSelector).length === 1) return classSelector;
-                let selectors = [];
-                while (element.parentNode) {
-                    let sibling = element;
-                    let nth = 1;
-                    while (sibling.previousElementSibling) {
-                        sibling = sibling.previousElementSibling;
-                        nth++;
-                    }
-                    selectors.unshift(`${element.tagName.toLowerCase()}:nth-child(${nth})`);
-                    if (element.parentElement.tagName.toLowerCase() === 'body' || element.id) break;
-                    element = element.parentElement;
-                }
+                if (classSelector && classSelectorCount(classSelector) === 1) return classSelector;
 
-                const selector = selectors.join(' > ');
+                const selector = nthChildChain(element);
                 if (selector === tagName) {
                     const findChildWithClasses = (el) => {
                         for (let child of el.children) {
@@ -52,44 +194,100 @@ class CrawlerHelpers:
                 return selector;
             }
 
-            function isVisibleInViewport(element) {
-                var style = window.getComputedStyle(element);
+            function isVisibleStyle(style) {
                 return style && style.display !== 'none' && style.visibility !== 'hidden' && style.opacity !== '0';
             }
 
+            // Single pass over the subtree in document order. Each node's style is
+            // read once, and whether an included ancestor exists is carried down the
+            // walk instead of re-checking every candidate against all the others.
+            function collectClickable(root, includeRoot, isIncluded) {
+                var found = [];
+
+                function visit(node, underIncluded) {
+                    var style = window.getComputedStyle(node);
+                    var included = isIncluded(node, style);
+                    if (included && !underIncluded && isVisibleStyle(style) && !node.getAttribute('detected')) {
+                        found.push({ element: node, include: true });
+                    }
+                    return underIncluded || included;
+                }
+
+                var insideIncluded = [includeRoot ? visit(root, false) : false];
+                var walker = document.createTreeWalker(root, NodeFilter.SHOW_ELEMENT);
+                var node = walker.firstChild();
+                while (node) {
+                    var childrenInside = visit(node, insideIncluded[insideIncluded.length - 1]);
+                    if (walker.firstChild()) {
+                        insideIncluded.push(childrenInside);
+                        node = walker.currentNode;
+                        continue;
+                    }
+                    node = null;
+                    while (!node) {
+                        if (walker.nextSibling()) {
+                            node = walker.currentNode;
+                        } else if (walker.parentNode() && walker.currentNode !== root) {
+                            insideIncluded.pop();
+                        } else {
+                            break;
+                        }
+                    }
+                }
+                return found;
+            }
+
+            // 64-bit fingerprint as 16 hex digits: two independent 32-bit hashes
+            // (FNV-1a and a murmur-style mix), since one 32-bit hash collides at scale.
+            function fingerprint(str) {
+                var h1 = 0x811c9dc5;
+                var h2 = 0x9747b28c;
+                for (var i = 0; i < str.length; i++) {
+                    var code = str.charCodeAt(i);
+                    h1 = Math.imul(h1 ^ code, 0x01000193);
+                    h2 = Math.imul(h2 ^ code, 0x5bd1e995);
+                    h2 ^= h2 >>> 15;
+                }
+                return (h1 >>> 0).toString(16).padStart(8, '0') + (h2 >>> 0).toString(16).padStart(8, '0');
+            }
+
+            function tagPath(element) {
+                var path = [];
+                for (var node = element; node && node.tagName && node.tagName !== 'BODY'; node = node.parentElement) {
+                    path.push(node.tagName);
+                }
+                return path.reverse().join('>');
+            }
+
+            // Structure rather than content, so the same header, nav or footer
+            // control gets the same hash on every page that shares the layout.
             function createHash(element) {
-                var str = element.tagName + ':' + (element.id || "") + (element.name || "") + ':' + (element.getAttribute('href') || "") + ':' + (element.getAttribute('aria-label') || "") + ':' + (element.getAttribute('for') || "") + ':' + (element.textContent || "");
-                return str.split('').reduce((hash, char) => {
-                    var code = char.charCodeAt(0);
-                    hash = ((hash << 5) - hash) + code;
-                    return hash & hash; // Convert to 32-bit integer
-                }, 0);
+                var text = (element.textContent || "").replace(/\\s+/g, ' ').trim().slice(0, 40);
+                return fingerprint([
+                    tagPath(element),
+                    element.id || "",
+                    element.getAttribute('name') || "",
+                    element.getAttribute('type') || "",
+                    element.getAttribute('role') || "",
+                    element.getAttribute('href') || "",
+                    element.getAttribute('aria-label') || "",
+                    element.getAttribute('for') || "",
+                    text
+                ].join('|'));
             }
 
-            function isReallyClickable(element) {
+            function isReallyClickable(element, style) {
                 if (element.hasAttribute('data-reach-dialog-overlay')) {
                     return false;
                 }
                 const clickableTags = ["BUTTON", "A", "INPUT"];
                 const isClickableTag = clickableTags.includes(element.tagName);
-                const hasPointerCursor = window.getComputedStyle(element).cursor === 'pointer';
+                const hasPointerCursor = style.cursor === 'pointer';
                 return isClickableTag || hasPointerCursor;
             }
 
-            function detectClickableWithin(level, element, parentElement, levelOrders) {
-                var items = Array.prototype.slice.call(element.querySelectorAll('*')).map(function(child) {
-                    var include = isReallyClickable(child);
-                    return {
-                        element: child,
-                        include: include,
-                    };
-                });
-
-                items = items.filter(x => x.include && isVisibleInViewport(x.element) && !x.element.getAttribute('detected') && !hasClickableParent(x.element, items));
-
-                function hasClickableParent(childElement, allItems) {
-                    return allItems.some(item => item.element.contains(childElement) && item.include && item.element !== childElement);
-                }
+            function detectClickableWithin(level, element, parentElement, levelOrders, includeElement = false) {
+                var items = collectClickable(element, includeElement, isReallyClickable);
 
                 items.forEach(function(item) {
                     item.element.style.border = "3px dashed " + colors[level % colors.length];
@@ -116,11 +314,7 @@ class CrawlerHelpers:
 
                     if (parentElement) {
                         var parentHash = createHash(parentElement);
-                        var parentInfo = window.detected_elements.find(function(elem) {
-                            return (
-                                elem.hash === parentHash
-                            );
-                        });
+                        var parentInfo = window.detected_elements_by_hash.get(parentHash);
                         if (parentInfo) {
                             elementInfo.parentElement = {
                                 level: parentInfo.level,
@@ -131,40 +325,24 @@ class CrawlerHelpers:
                         }
                     }
 
-                    var alreadyDetected = window.detected_elements.some(function(detectedElement) {
-                        return detectedElement.hash === hash;
-                    });
-
-                    if (!alreadyDetected) {
-                        elementInfo.hash = hash;
-                        window.detected_elements.push(elementInfo);
-                        highlightAndStoreInputSets(parentInfo ? parentInfo.hash : null);
-                    }
+                    elementInfo.hash = hash;
+                    // Input sets are left to the caller, which scans the same root for them once
+                    storeDetected(window.detected_elements, window.detected_elements_by_hash, elementInfo);
                 });
             }
 
             var levelOrders = {}; // Object to hold order for each level
 
-            function findAndHighlightElements(level, parentElement, levelOrders) {
-                var items = Array.prototype.slice.call(
-                    document.querySelectorAll('*')
-                ).map(function(element) {
-                    var include = (element.tagName === "BUTTON" || element.tagName === "A" ||
-                        (element.tagName.toLowerCase().indexOf('input') > -1 && element.type == "button") ||
-                        (element.onclick != null) ||
-                        window.getComputedStyle(element).cursor == "pointer") ||
-                        Array.from(element.classList).some(className => className.includes('dropdown'));
-                    return {
-                        element: element,
-                        include: include,
-                    };
-                });
-
-                items = items.filter(x => x.include && isVisibleInViewport(x.element) && !x.element.getAttribute('detected') && !hasClickableParent(x.element, items));
+            function isClickableCandidate(element, style) {
+                return (element.tagName === "BUTTON" || element.tagName === "A" ||
+                    (element.tagName.toLowerCase().indexOf('input') > -1 && element.type == "button") ||
+                    (element.onclick != null) ||
+                    style.cursor == "pointer") ||
+                    Array.from(element.classList).some(className => className.includes('dropdown'));
+            }
 
-                function hasClickableParent(element, allItems) {
-                    return allItems.some(item => item.element.contains(element) && item.include && item.element !== element);
-                }
+            function findAndHighlightElements(level, parentElement, levelOrders) {
+                var items = collectClickable(document.documentElement, true, isClickableCandidate);
 
                 items.forEach(function(item, index) {
                     item.element.style.border = "3px dashed " + colors[level % colors.length];
@@ -197,7 +375,7 @@ class CrawlerHelpers:
 
                             if (clickedElement) {
                                 var parentHash = createHash(clickedElement);
-                                var parentDetected = window.detected_elements.find(elem => elem.hash === parentHash);
+                                var parentDetected = window.detected_elements_by_hash.get(parentHash);
 
                                 if (parentDetected) {
                                     elementInfo.parentElement = {
@@ -208,14 +386,8 @@ class CrawlerHelpers:
                                 }
                             }
 
-                            var alreadyDetected = window.detected_elements.some(function(detectedElement) {
-                                return detectedElement.hash === elementHash;
-                            });
-
-                            if (!alreadyDetected) {
-                                elementInfo.hash = elementHash;
-                                window.detected_elements.push(elementInfo);
-                            }
+                            elementInfo.hash = elementHash;
+                            storeDetected(window.detected_elements, window.detected_elements_by_hash, elementInfo);
 
                             // Update the order for the next element on the same level
                             levelOrders[level] = elementInfo.order + 1;
@@ -230,6 +402,14 @@ class CrawlerHelpers:
                     item.element.addEventListener('click', async function(event) {
                         const clickedElement = event.currentTarget;  // Get the element on which the event handler was attached
 
+                        if (incremental) {
+                            // The persistent observer records whatever the click reveals,
+                            // and collectDetectionDelta scans just that when asked.
+                            withoutRecording(() => inspectChildElements(clickedElement, clickedElement, level + 1, levelOrders, colors));
+                            window.__detectionDelta.clicked = clickedElement;
+                            return;
+                        }
+
                         inspectChildElements(clickedElement, clickedElement, level + 1, levelOrders, colors);
 
                         requestAnimationFrame(function() {
@@ -248,6 +428,8 @@ class CrawlerHelpers:
                                                 node.childNodes.forEach(child => {
                                                     if (child.nodeType === Node.ELEMENT_NODE) {
                                                         detectClickableWithin(level + 1, child, clickedElement, levelOrders);  // Pass the clicked element as the parent
+                                                        var clickedInfo = window.detected_elements_by_hash.get(createHash(clickedElement));
+                                                        highlightAndStoreInputSets(clickedInfo ? clickedInfo.hash : null, child);
                                                     }
                                                 });
                                             }
@@ -287,11 +469,7 @@ class CrawlerHelpers:
 
                     if (parentElement) {
                         parentHash = createHash(parentElement)
-                        var parentInfo = window.detected_elements.find(function(elem) {
-                            return (
-                                elem.hash === parentHash
-                            );
-                        });
+                        var parentInfo = window.detected_elements_by_hash.get(parentHash);
                         if (parentInfo) {
                             elementInfo.parentElement = {
                                 level: parentInfo.level,
@@ -302,26 +480,11 @@ class CrawlerHelpers:
                         }
                     }
 
-                    var alreadyDetected = window.detected_elements.some(function(detectedElement) {
-                        return detectedElement.hash === hash;
-                    });
-
-                    if (!alreadyDetected) {
-                        elementInfo.hash = hash;
-                        window.detected_elements.push(elementInfo);
-                    }
+                    elementInfo.hash = hash;
+                    storeDetected(window.detected_elements, window.detected_elements_by_hash, elementInfo);
                 });
             }
 
-            function createInputHash(str) {
-                str = String(str);
-                return str.split('').reduce((hash, char) => {
-                    var code = char.charCodeAt(0);
-                    hash = ((hash << 5) - hash) + code;
-                    return hash & hash; // Convert to 32-bit integer
-                }, 0);
-            }
-
             function detectInputSetsWithin(element) {
                 var inputs = Array.from(element.querySelectorAll('input:not([type="button"]), textarea, select, button[type="submit"], input[type="submit"]'));
                 if (inputs.length === 0) return [];
@@ -350,17 +513,23 @@ class CrawlerHelpers:
                 return inputSets;
             }
 
-            function highlightAndStoreInputSets(parent = undefined) {
+            function highlightAndStoreInputSets(parent = undefined, root = document.body) {
                 var detectedInputSetInfos = [];
-                var inputSets = detectInputSetsWithin(document.body);
+                var inputSets = detectInputSetsWithin(root);
                 inputSets.forEach((inputSet, index) => {
                     var concatenatedInputDetails = inputSet.inputs.reduce((acc, input) => {
                         return acc + input.tagName + input.type + input.name + input.placeholder;
                     }, '');
-                    fullInput = concatenatedInputDetails + inputSet.container.tagName + inputSet.container.className + window.location.href
-                    var hash = createInputHash(fullInput);
+                    var fullInput = concatenatedInputDetails + tagPath(inputSet.container) + inputSet.container.className;
+                    if (templateScope !== 'site') {
+                        // Page scope: the same form on another page is submitted again
+                        fullInput += window.location.href;
+                    }
+                    var hash = fingerprint(fullInput);
                     inputSet.container.style.border = "3px dashed " + colors[(index + 1) % colors.length];
                     inputSet.container.setAttribute('detected-input-set', 'true');
+                    // Lets Python find the container with one selector, however its content changes
+                    inputSet.container.setAttribute('data-crawler-input-set', hash);
 
                     var inputSetInfo = {
                         type: 'inputSet',
@@ -384,25 +553,27 @@ class CrawlerHelpers:
                         }))
                     };
 
-                    var alreadyDetected = window.detected_input_elements.some(function(detectedElement) {
-                        return detectedElement.hash === hash;
-                    });
-
-                    if (!alreadyDetected) {
-                        inputSetInfo.hash = hash;
-                        inputSetInfo.parentHash = parent;
-                        window.detected_input_elements.push(inputSetInfo);
+                    inputSetInfo.hash = hash;
+                    inputSetInfo.parentHash = parent;
+                    if (storeDetected(window.detected_input_elements, window.detected_input_elements_by_hash, inputSetInfo)) {
                         detectedInputSetInfos.push(inputSetInfo);
                     }
                 });
                 return detectedInputSetInfos;
             }
 
+            var scrollSteps = 0;
+
             function scrollElementIncrementally(element, step, callback) {
                 let lastScrollTop = element.scrollTop;
                 let scrollInterval = setInterval(() => {
+                    if (scrollSteps >= scrollBudget) {
+                        clearInterval(scrollInterval);
+                        return;
+                    }
+                    scrollSteps++;
                     element.scrollBy(0, step);
-                    findAndHighlightElements(0, null, levelOrders); // Detection during scroll
+                    withoutRecording(() => findAndHighlightElements(0, null, levelOrders)); // Detection during scroll
                     if (element.scrollTop === lastScrollTop) {
                         clearInterval(scrollInterval);
                         callback();
@@ -420,40 +591,276 @@ class CrawlerHelpers:
                 return containers[0] || null;
             }
 
-            const stepSize = window.innerHeight; // Change this value to alter the scroll step, currently set to one viewport height
-            scrollElementIncrementally(window, stepSize, () => {
-                const largestScrollContainer = findLargestScrollContainer();
-                if (largestScrollContainer) {
-                    scrollElementIncrementally(largestScrollContainer, stepSize, () => {});
+            // Observer mode: scroll a viewport at a time within the budget, and scan only
+            // the nodes added while scrolling, once they actually come into view.
+            function discoverByScrolling() {
+                var revealed = 0;
+                var lastMutation = performance.now();
+
+                function scanRevealed(entries) {
+                    entries.forEach(function(entry) {
+                        if (!entry.isIntersecting) return;
+                        visibility.unobserve(entry.target);
+                        if (!entry.target.isConnected) return;
+                        revealed++;
+                        withoutRecording(function() {
+                            detectClickableWithin(0, entry.target, null, levelOrders, true);
+                            highlightAndStoreInputSets(undefined, entry.target);
+                        });
+                    });
                 }
-            });
-            highlightAndStoreInputSets();
-        })();
-        """
-        different_elements = []
-        different_input_elements = []
-        new_elements = []
-        await page.evaluate(script)
-        await asyncio.sleep(1)
-        updated_elements = await page.evaluate("window.detected_elements")
-        updated_input_elements = await page.evaluate("window.detected_input_elements")
 
-        new_elements = [
-            el for el in updated_input_elements if el["hash"] not in {el["hash"] for el in input_elements_from_crawler}
-        ]
+                var visibility = new IntersectionObserver(scanRevealed);
+                var additions = new MutationObserver(function(mutations) {
+                    lastMutation = performance.now();
+                    mutations.forEach(function(mutation) {
+                        mutation.addedNodes.forEach(function(node) {
+                            if (node.nodeType === Node.ELEMENT_NODE && node.tagName !== 'STYLE' && node.tagName !== 'SCRIPT') {
+                                visibility.observe(node);
+                            }
+                        });
+                    });
+                });
+                additions.observe(document.body, { childList: true, subtree: true });
+
+                function delay(ms) {
+                    return new Promise(resolve => setTimeout(resolve, ms));
+                }
+
+                async function waitForQuiet(quietMs, maxMs) {
+                    var start = performance.now();
+                    while (performance.now() - lastMutation < quietMs && performance.now() - start < maxMs) {
+                        await delay(50);
+                    }
+                }
+
+                async function scrollThrough(target) {
+                    var isWindow = target === window;
+                    var position = () => isWindow ? window.scrollY : target.scrollTop;
+                    var height = () => isWindow ? document.documentElement.scrollHeight : target.scrollHeight;
+                    while (scrollSteps < scrollBudget) {
+                        var lastPosition = position();
+                        target.scrollBy(0, window.innerHeight);
+                        scrollSteps++;
+                        await waitForQuiet(200, 1500);
+                        if (position() === lastPosition) {
+                            // At the bottom; give infinite scroll one chance to append more
+                            var lastHeight = height();
+                            await delay(1000);
+                            if (height() === lastHeight) return;
+                        }
+                    }
+                }
+
+                function findScrollContainerAtCenter() {
+                    // The container a user would scroll, without styling every element on the page
+                    var node = document.elementFromPoint(window.innerWidth / 2, window.innerHeight / 2);
+                    for (; node && node !== document.body && node !== document.documentElement; node = node.parentElement) {
+                        var overflowY = getComputedStyle(node).overflowY;
+                        if (node.scrollHeight > node.clientHeight && (overflowY === 'auto' || overflowY === 'scroll')) return node;
+                    }
+                    return null;
+                }
+
+                return (async function() {
+                    await scrollThrough(window);
+                    var container = findScrollContainerAtCenter();
+                    if (container) {
+                        await scrollThrough(container);
+                    }
+                    await new Promise(resolve => requestAnimationFrame(resolve));
+                    scanRevealed(visibility.takeRecords());
+                    additions.disconnect();
+                    visibility.disconnect();
+                    return { steps: scrollSteps, revealed: revealed, budgetExhausted: scrollSteps >= scrollBudget };
+                })();
+            }
+
+            // Incremental mode: a persistent observer remembers which subtrees were
+            // added or changed, and collectDetectionDelta scans only those.
+            function withoutRecording(fn) {
+                var state = window.__detectionDelta;
+                if (!state) return fn();
+                state.record(state.observer.takeRecords());
+                var result = fn();
+                state.observer.takeRecords(); // Drop the mutations our own highlighting caused
+                return result;
+            }
+
+            function startDeltaTracking() {
+                if (window.__detectionDelta) {
+                    window.__detectionDelta.observer.disconnect();
+                }
+                var state = window.__detectionDelta = {
+                    pending: new Set(),
+                    clicked: null,
+                    record: function(mutations) {
+                        mutations.forEach(function(mutation) {
+                            if (mutation.type === 'attributes') {
+                                state.pending.add(mutation.target);
+                                return;
+                            }
+                            mutation.addedNodes.forEach(function(node) {
+                                if (node.nodeType === Node.ELEMENT_NODE) {
+                                    state.pending.add(node);
+                                }
+                            });
+                        });
+                    }
+                };
+                state.observer = new MutationObserver(state.record);
+                state.observer.observe(document, {
+                    childList: true,
+                    subtree: true,
+                    attributes: true,
+                    attributeFilter: ['class', 'style', 'hidden', 'open', 'aria-expanded']
+                });
+            }
+
+            function changedRoots(pending) {
+                // Only the outermost changed nodes, so no subtree is scanned twice
+                return Array.from(pending).filter(function(node) {
+                    if (!node.isConnected || node.tagName === 'STYLE' || node.tagName === 'SCRIPT') return false;
+                    for (var ancestor = node.parentElement; ancestor; ancestor = ancestor.parentElement) {
+                        if (pending.has(ancestor)) return false;
+                    }
+                    return true;
+                });
+            }
+
+            window.collectDetectionDelta = function(level) {
+                var state = window.__detectionDelta;
+                if (!state) return;
+                withoutRecording(function() {
+                    var roots = changedRoots(state.pending);
+                    var parentElement = state.clicked;
+                    var parentHash = parentElement ? createHash(parentElement) : undefined;
+                    state.pending = new Set();
+                    state.clicked = null;
+
+                    roots.forEach(function(root) {
+                        detectClickableWithin(level, root, parentElement, levelOrders, true);
+                        highlightAndStoreInputSets(parentHash, root);
+                    });
+                });
+            };
+
+            // Export API: a cursor from an earlier export returns only what was detected
+            // since, while a cursor from an earlier scan of the page starts over.
+            var scanId = Date.now().toString(36) + Math.random().toString(36).slice(2, 8);
+
+            function exportView(info, includeHtml) {
+                var view = Object.assign({}, info);
+                var html = info.innerHTML || "";
+                // Short plain text stays, it is what tells same-selector elements apart
+                if (!includeHtml && (html.length > 200 || /[<>]/.test(html))) {
+                    delete view.innerHTML;
+                }
+                return view;
+            }
 
-        if new_elements:
-            input_elements_from_crawler.extend(new_elements)
-            different_input_elements.extend(new_elements)
+            window.exportDetected = function(cursor, includeHtml) {
+                var start = cursor && cursor.scanId === scanId ? cursor : { elements: 0, inputElements: 0 };
+                return {
+                    elements: window.detected_elements.slice(start.elements).map(info => exportView(info, includeHtml)),
+                    inputElements: window.detected_input_elements.slice(start.inputElements).map(info => exportView(info, includeHtml)),
+                    cursor: {
+                        scanId: scanId,
+                        elements: window.detected_elements.length,
+                        inputElements: window.detected_input_elements.length
+                    }
+                };
+            };
 
-        different_elements_by_hash = [
-            el for el in updated_elements if el["hash"] not in {el["hash"] for el in elements_from_crawler}
-        ]
+            generateSelectorPath = withSelectorCache(generateSelectorPath);
+            findAndHighlightElements = withSelectorCache(findAndHighlightElements);
+            detectClickableWithin = withSelectorCache(detectClickableWithin);
+            highlightAndStoreInputSets = withSelectorCache(highlightAndStoreInputSets);
 
-        if different_elements_by_hash:
-            elements_from_crawler.extend(different_elements_by_hash)
-            different_elements.extend(different_elements_by_hash)
+            if (incremental) {
+                startDeltaTracking();
+            }
 
-        await asyncio.sleep(0.1)
+            // Scanned before any scrolling, so the export right after this script has the page
+            withoutRecording(() => findAndHighlightElements(0, null, levelOrders));
+            if (options.scrollMode === 'observer') {
+                window.__scrollDiscovery = discoverByScrolling();
+            } else {
+                const stepSize = window.innerHeight; // Change this value to alter the scroll step, currently set to one viewport height
+                scrollElementIncrementally(window, stepSize, () => {
+                    const largestScrollContainer = findLargestScrollContainer();
+                    if (largestScrollContainer) {
+                        scrollElementIncrementally(largestScrollContainer, stepSize, () => {});
+                    }
+                });
+            }
+            withoutRecording(() => highlightAndStoreInputSets());
+        })
+        """
+        await page.evaluate(
+            script,
+            {
+                "incremental": incremental,
+                "templateScope": template_scope,
+                "scrollMode": scroll_mode,
+                "scrollBudget": scroll_budget,
+            },
+        )
+        if scroll_mode == "observer":
+            await self.wait_for_scroll_discovery(page)
+        updated_elements, updated_input_elements = await self.export_detected(
+            page, include_html, delta_level=0 if incremental else None
+        )
+
+        # Both are ElementRegistry instances, which only keep hashes they have not seen
+        input_elements_from_crawler.extend(updated_input_elements)
+        elements_from_crawler.extend(updated_elements)
 
         return elements_from_crawler, input_elements_from_crawler
+
+    async def wait_for_scroll_discovery(self, page):
+        """Wait for the detection script to finish scrolling through the page."""
+        try:
+            discovery = await page.evaluate("() => window.__scrollDiscovery")
+            logging.info(f"Scroll discovery on {page.url}: {discovery}")
+        except Exception as e:
+            # Most likely the page navigated away while it was being scrolled
+            logging.warning(f"Scroll discovery on {page.url} did not finish: {e}")
+
+    async def probe_selectors(self, page, selectors, enable_disabled=False, unhide=False):
+        """Probe several selectors in one page.evaluate instead of a round trip per check.
+
+        Each probe reports the match count plus the first match's visibility and
+        disabled state. enable_disabled strips a 'disabled' class from the match's
+        parent and reports it as disabled; unhide undoes display: none and hidden.
+        """
+        return await page.evaluate(
+            self.PROBE_SELECTORS,
+            [selectors, {"enableDisabled": enable_disabled, "unhide": unhide}],
+        )
+
+    async def normalized_dom(self, page):
+        """The page's HTML without the parts that change on every load.
+
+        Script contents, hidden input values, CSRF meta tags and nonce, integrity
+        and token attributes are dropped, so an otherwise unchanged page
+        serializes the same way twice.
+        """
+        return await page.evaluate(self.NORMALIZED_DOM)
+
+    async def export_detected(self, page, include_html=False, delta_level=None):
+        """Return the elements and input sets detected on the page since its last export.
+
+        With delta_level set, the subtrees changed since the last scan are scanned
+        first, at that level (incremental mode).
+        """
+        export = await page.evaluate(
+            self.EXPORT_DETECTED, [self.export_cursors.get(page), include_html, delta_level]
+        )
+        if export is None:
+            return [], []
+        self.export_cursors[page] = export["cursor"]
+        return export["elements"], export["inputElements"]
+
+    def forget_page(self, page):
+        self.export_cursors.pop(page, None)
@@ -0,0 +1,62 @@
+from collections import deque
+
+
+class ValueMatcher:
+    """Aho-Corasick automaton that finds every filled in value in one pass over a text.
+
+    Built once per set of values, so requests sent while the same form values
+    are pending reuse it instead of searching for each value separately.
+    """
+
+    def __init__(self, values=()):
+        self.values = tuple(values)
+        self.transitions = [{}]
+        self.fail = [0]
+        self.output = [()]
+        for value in dict.fromkeys(self.values):
+            # An empty value would match at every position
+            if value:
+                self.insert(value)
+        self.link()
+
+    def insert(self, value):
+        state = 0
+        for char in value:
+            next_state = self.transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions.append({})
+                self.fail.append(0)
+                self.output.append(())
+                self.transitions[state][char] = next_state
+            state = next_state
+        self.output[state] += (value,)
+
+    def link(self):
+        """Set every state's fail link to its longest proper suffix that is also a prefix."""
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                fail_state = self.transitions[fallback].get(char, 0)
+                self.fail[next_state] = fail_state
+                self.output[next_state] += self.output[fail_state]
+
+    def find(self, text):
+        """Every (value, start, end) occurrence in text, in the order they end."""
+        if not text or len(self.transitions) == 1:
+            return []
+        matches = []
+        transitions, fail, output = self.transitions, self.fail, self.output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            for value in output[state]:
+                matches.append((value, index + 1 - len(value), index + 1))
+        return matches
@@ -0,0 +1,60 @@
+import json
+from pathlib import Path
+
+
+class RecrawlIndex:
+    def __init__(self, previous_results):
+        self.page_validators = previous_results.get("page_validators", {})
+        self.pages_to_test = previous_results.get("pages_to_test", [])
+        self.elements_by_page = self.group_by(previous_results.get("detected_elements", []), "currentUrl")
+        self.input_elements_by_page = self.group_by(previous_results.get("detected_input_elements", []), "currentUrl")
+        self.requests_by_page = {}
+        for result_key in ("requests", "static_requests"):
+            for record in previous_results.get(result_key, []):
+                request_info = json.loads(record)
+                self.requests_by_page.setdefault(request_info.get("page_url"), []).append(request_info)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as file:
+            previous_results = json.load(file)
+
+        # NDJSON crawls keep their traffic next to the summary file instead of in it
+        streamed_directory = Path(path).with_name(Path(path).name.replace("_crawl_results.json", "_results"))
+        if streamed_directory.is_dir():
+            for result_key in ("requests", "static_requests"):
+                streamed_file = streamed_directory / f"{result_key}.ndjson"
+                if not previous_results.get(result_key) and streamed_file.exists():
+                    with open(streamed_file, "r") as file:
+                        previous_results[result_key] = [line for line in file if line.strip()]
+        return cls(previous_results)
+
+    @staticmethod
+    def group_by(elements, key):
+        grouped = {}
+        for element in elements:
+            grouped.setdefault(element.get(key), []).append(element)
+        return grouped
+
+    def is_unchanged(self, url, validators):
+        """Compare a page against the previous run.
+
+        HTTP validators only ever prove a change: an SPA shell keeps its ETag while
+        what it renders changes, so an unchanged page also needs the same DOM digest.
+        """
+        previous = self.page_validators.get(url)
+        if not previous:
+            return False
+        for validator in ("etag", "last_modified"):
+            if validators.get(validator) and previous.get(validator) and validators[validator] != previous[validator]:
+                return False
+        return bool(validators.get("digest")) and validators["digest"] == previous.get("digest")
+
+    def elements_for(self, url):
+        return self.elements_by_page.get(url, [])
+
+    def input_elements_for(self, url):
+        return self.input_elements_by_page.get(url, [])
+
+    def requests_for(self, url):
+        return self.requests_by_page.get(url, [])
@@ -0,0 +1,60 @@
+class ElementRegistry:
+    """Detected elements in discovery order, indexed by hash and by (hash, parent hash).
+
+    The elements themselves stay plain dicts, since they are mutated in place
+    while clicking and exported to JSON as they are.
+    """
+
+    __slots__ = ("elements", "by_hash", "pairs")
+
+    def __init__(self, elements=()):
+        self.elements = []
+        self.by_hash = {}
+        self.pairs = set()
+        for element in elements:
+            self.insert(element)
+
+    @staticmethod
+    def pair_key(element):
+        return element.get("hash"), (element.get("parentElement") or {}).get("hash")
+
+    def insert(self, element):
+        self.elements.append(element)
+        self.by_hash.setdefault(element.get("hash"), element)
+        self.pairs.add(self.pair_key(element))
+
+    def add(self, element):
+        """Keep an element unless one with the same hash is already known."""
+        if element.get("hash") in self.by_hash:
+            return False
+        self.insert(element)
+        return True
+
+    def add_under_parent(self, element):
+        """Keep an element unless it is already known under the same parent."""
+        if self.pair_key(element) in self.pairs:
+            return False
+        self.insert(element)
+        return True
+
+    def extend(self, elements):
+        return [element for element in elements if self.add(element)]
+
+    def get(self, element_hash):
+        return self.by_hash.get(element_hash)
+
+    def __contains__(self, element_hash):
+        return element_hash in self.by_hash
+
+    def __iter__(self):
+        # A list iterator, so loops also visit elements found while they run
+        return iter(self.elements)
+
+    def __len__(self):
+        return len(self.elements)
+
+    def __getitem__(self, index):
+        return self.elements[index]
+
+    def __repr__(self):
+        return repr(self.elements)
@@ -0,0 +1,82 @@
+import json
+from pathlib import Path
+
+
+def results_directory(config):
+    """Directory streamed results go to, next to where save_results writes the summary."""
+    base_name = config["base_url"].replace("http://", "").replace("https://", "").replace("/", "_")
+    directory = Path(config.get("output") or ".") / f"{base_name}_results"
+    if config.get("shard_count", 1) > 1:
+        directory = directory / f"shard_{config.get('shard_index', 0)}"
+    return directory
+
+
+class ResultStore:
+    """Keeps captured traffic in memory as JSON strings, the classic results format."""
+
+    TRAFFIC_KINDS = ("requests", "static_requests", "responses", "static_responses", "blocked_resources")
+
+    def __init__(self):
+        self.records = {kind: [] for kind in self.TRAFFIC_KINDS}
+        self.counts = {}
+
+    def add(self, kind, record):
+        """Record one captured request or response."""
+        self.records[kind].append(json.dumps(record))
+        self.count(kind)
+
+    def stream(self, kind, record):
+        """Record something the crawler itself keeps in memory, such as a page or element."""
+        self.count(kind)
+
+    def count(self, kind):
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def restore(self, records, counts):
+        for kind in self.TRAFFIC_KINDS:
+            self.records[kind] = records.get(kind, [])
+        self.counts = counts
+
+    def close(self):
+        pass
+
+
+class CountingResultStore(ResultStore):
+    """Keeps only per-kind counters, for crawls where the traffic itself is not needed."""
+
+    def add(self, kind, record):
+        self.count(kind)
+
+
+class NdjsonResultStore(ResultStore):
+    """Appends every record to <kind>.ndjson as it is produced, keeping only counters in memory."""
+
+    def __init__(self, directory, append=False):
+        super().__init__()
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.files = {}
+        if not append:
+            for stale_file in self.directory.glob("*.ndjson"):
+                stale_file.unlink()
+
+    def write(self, kind, record):
+        file = self.files.get(kind)
+        if file is None:
+            # Line buffered, so every finished record is on disk even if the crawl dies
+            file = open(self.directory / f"{kind}.ndjson", "a", buffering=1)
+            self.files[kind] = file
+        file.write(json.dumps(record) + "\n")
+
+    def add(self, kind, record):
+        self.write(kind, record)
+        self.count(kind)
+
+    def stream(self, kind, record):
+        self.write(kind, record)
+        self.count(kind)
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+        self.files = {}
@@ -0,0 +1,54 @@
+import base64
+import logging
+
+
+class ResourceBlocker:
+    RESOURCE_TYPES = ("image", "media", "font", "stylesheet", "script", "texttrack", "manifest")
+    MODES = ("abort", "stub")
+
+    # Stubs keep pages that wait on their assets' load events from stalling
+    STUB_BODIES = {
+        "image": ("image/gif", base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")),
+        "stylesheet": ("text/css", b""),
+        "script": ("application/javascript", b""),
+        "font": ("font/woff2", b""),
+        "media": ("video/mp4", b""),
+        "texttrack": ("text/vtt", b"WEBVTT\n"),
+        "manifest": ("application/manifest+json", b"{}"),
+    }
+
+    def __init__(self, resource_types, mode="abort", on_blocked=None):
+        self.resource_types = set(resource_types)
+        self.mode = mode
+        self.on_blocked = on_blocked
+
+    async def attach(self, context):
+        await context.route("**/*", self.handle_route)
+
+    def blocks(self, request):
+        return request.resource_type in self.resource_types
+
+    async def handle_route(self, route):
+        request = route.request
+        if not self.blocks(request):
+            await route.continue_()
+            return
+
+        if self.on_blocked:
+            self.on_blocked(
+                {
+                    "url": request.url,
+                    "method": request.method,
+                    "resource_type": request.resource_type,
+                    "action": self.mode,
+                }
+            )
+
+        try:
+            if self.mode == "stub":
+                content_type, body = self.STUB_BODIES[request.resource_type]
+                await route.fulfill(status=200, content_type=content_type, body=body)
+            else:
+                await route.abort("blockedbyclient")
+        except Exception as e:
+            logging.warning(f"Could not block {request.url}: {e}")
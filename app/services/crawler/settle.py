@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from urllib.parse import urlsplit
+
+
+class PageSettler:
+    """Waits until a page is actually quiet instead of sleeping or waiting for networkidle.
+
+    A page counts as settled once none of its requests are in flight and the DOM
+    has not mutated for a quiet window, or once the upper bound is reached.
+    A request is only taken for a long poll, and no longer waited on, when it
+    has been open for long_poll_ms and the page already requested the same
+    endpoint before, so a single slow request is still waited for.
+    """
+
+    # Long-lived by design; counting them would make every wait hit the bound
+    IGNORED_RESOURCE_TYPES = ("websocket", "eventsource", "ping")
+
+    MUTATION_SCRIPT = """
+    (() => {
+        if (window.__crawlerSettle) return;
+        const state = window.__crawlerSettle = { lastMutation: performance.now() };
+        new MutationObserver(() => { state.lastMutation = performance.now(); })
+            .observe(document, { childList: true, subtree: true, attributes: true, characterData: true });
+    })();
+    """
+
+    WAIT_FOR_QUIET_DOM = """
+    ([quietMs, timeoutMs]) => new Promise(resolve => {
+        const state = window.__crawlerSettle;
+        if (!state) {
+            resolve(true);
+            return;
+        }
+        const start = performance.now();
+        const check = () => {
+            const now = performance.now();
+            const quietFor = now - state.lastMutation;
+            if (quietFor >= quietMs) return resolve(true);
+            if (now - start >= timeoutMs) return resolve(false);
+            setTimeout(check, Math.min(quietMs - quietFor, timeoutMs - (now - start)));
+        };
+        check();
+    })
+    """
+
+    def __init__(self, quiet_ms=300, timeout_ms=5000, long_poll_ms=1500, poll_interval=0.05):
+        self.quiet_ms = quiet_ms
+        self.timeout_ms = timeout_ms
+        self.long_poll_ms = long_poll_ms
+        self.poll_interval = poll_interval
+        self.in_flight = {}  # Page -> {request: when it started} for requests it is still waiting on
+        self.endpoint_counts = {}  # Page -> {endpoint: times requested}
+
+    async def attach(self, page):
+        self.in_flight[page] = {}
+        self.endpoint_counts[page] = {}
+        await page.add_init_script(self.MUTATION_SCRIPT)
+        page.on("request", lambda request: self.request_started(page, request))
+        page.on("requestfinished", lambda request: self.request_done(page, request))
+        page.on("requestfailed", lambda request: self.request_done(page, request))
+        page.on("close", lambda _: self.forget(page))
+
+    def forget(self, page):
+        self.in_flight.pop(page, None)
+        self.endpoint_counts.pop(page, None)
+
+    @staticmethod
+    def endpoint(request):
+        # Long polls usually carry a cursor in the query, so it is left out
+        parsed = urlsplit(request.url)
+        return request.method, parsed.netloc, parsed.path
+
+    def request_started(self, page, request):
+        if request.resource_type not in self.IGNORED_RESOURCE_TYPES:
+            self.in_flight.setdefault(page, {})[request] = time.monotonic()
+            counts = self.endpoint_counts.setdefault(page, {})
+            endpoint = self.endpoint(request)
+            counts[endpoint] = counts.get(endpoint, 0) + 1
+
+    def request_done(self, page, request):
+        # Keyed by request rather than counted, so a missed or repeated event cannot drift
+        self.in_flight.get(page, {}).pop(request, None)
+
+    def is_long_poll(self, page, request, started, cutoff):
+        return started <= cutoff and self.endpoint_counts.get(page, {}).get(self.endpoint(request), 0) > 1
+
+    def waiting_on_requests(self, page):
+        cutoff = time.monotonic() - self.long_poll_ms / 1000
+        return any(
+            not self.is_long_poll(page, request, started, cutoff)
+            for request, started in self.in_flight.get(page, {}).items()
+        )
+
+    async def settle(self, page):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout_ms / 1000
+
+        while True:
+            while self.waiting_on_requests(page):
+                if loop.time() >= deadline:
+                    logging.info(f"{page.url} did not settle within {self.timeout_ms} ms, moving on.")
+                    return False
+                await asyncio.sleep(self.poll_interval)
+
+            remaining_ms = max(int((deadline - loop.time()) * 1000), 0)
+            try:
+                dom_quiet = await page.evaluate(self.WAIT_FOR_QUIET_DOM, [self.quiet_ms, remaining_ms])
+            except Exception:
+                # The page navigated while we waited, so it is anything but quiet
+                dom_quiet = False
+
+            if dom_quiet and not self.waiting_on_requests(page):
+                return True
+            if loop.time() >= deadline:
+                logging.info(f"{page.url} did not settle within {self.timeout_ms} ms, moving on.")
+                return False
+            if not dom_quiet:
+                await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,247 @@
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import queue
+from itertools import islice
+
+from .frontier import Frontier
+from .templates import RequestTemplateIndex
+
+
+def shard_for_url(url, shard_count):
+    # Python's hash() is salted per process, so shard ownership is derived
+    # from a stable digest that every worker process agrees on.
+    digest = hashlib.sha1(Frontier.canonicalize(url).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+def run_shard(config, shard_index, inbox, outbox):
+    """Crawl one shard in its own process and browser until the coordinator stops it."""
+    from ..dependencies import DependencyManager
+    from ...common.helpers import CommonHelpers
+
+    async def crawl():
+        dependency_manager = DependencyManager()
+        shard_config = dict(config, starting_point=[], shard_index=shard_index)
+        crawler = await dependency_manager.get_crawler(shard_config)
+        if not crawler:
+            raise RuntimeError(f"Could not create crawler for shard {shard_index}")
+        crawler.expecting_pages = True
+
+        playwright, context, browser = await CommonHelpers.initialize_playwright(
+            browser_type=config.get("browser", "firefox"),
+            headless=config.get("headless", False),
+            ws_endpoint=config.get("browser_server"),
+        )
+        exchange = asyncio.create_task(exchange_pages(crawler, shard_index, inbox, outbox))
+        try:
+            return await crawler.run(context)
+        finally:
+            exchange.cancel()
+            await context.close()
+            await browser.close()
+            await playwright.stop()
+
+    try:
+        outbox.put(("results", shard_index, asyncio.run(crawl())))
+    except Exception as e:
+        outbox.put(("failed", shard_index, f"{type(e).__name__}: {e}"))
+
+
+async def exchange_pages(crawler, shard_index, inbox, outbox, poll_interval=0.1):
+    """Feed a running shard the pages routed to it, and report what it finds for other shards.
+
+    Every time the shard runs out of work it reports how many batches it has
+    taken in, so the coordinator can tell an idle shard from one that simply
+    has not read its latest batch yet.
+    """
+    received = 0
+    reported = None
+    shipped = 0
+    while True:
+        while True:
+            try:
+                message, urls = inbox.get_nowait()
+            except queue.Empty:
+                break
+            if message == "stop":
+                crawler.expecting_pages = False
+                return
+            for url in urls:
+                crawler.enqueue_page(url)
+            received += 1
+
+        foreign_pages = list(islice(crawler.foreign_pages.values(), shipped, None))
+        if foreign_pages:
+            outbox.put(("pages", shard_index, foreign_pages))
+            shipped += len(foreign_pages)
+
+        # Sent after the pages it found, and the queue keeps their order
+        if crawler.is_idle() and reported != received:
+            outbox.put(("idle", shard_index, received))
+            reported = received
+        await asyncio.sleep(poll_interval)
+
+
+class ShardCoordinator:
+    def __init__(self, config, ansi_colors):
+        self.config = config
+        self.ansi_colors = ansi_colors
+        self.shard_count = config["shard_count"]
+
+    async def run(self):
+        """Crawl with one long-lived process per shard, routing every discovered page to its owner.
+
+        Shards keep their browser, login and detected elements for the whole
+        crawl. The pages they find for other shards are forwarded once each to
+        the shard that owns them, and the crawl ends when every shard is idle
+        and has taken in every batch sent to it.
+        """
+        loop = asyncio.get_running_loop()
+        merged_results = {
+            "pages_to_test": [],
+            "detected_elements": [],
+            "detected_input_elements": [],
+            "requests": [],
+            "static_requests": [],
+            "responses": [],
+            "static_responses": [],
+            "blocked_resources": [],
+        }
+        seen_keys = {key: set() for key in merged_results}
+        # Every shard sampled its request templates on its own, so sample again across them
+        for key in ("requests", "static_requests"):
+            seen_keys[key] = RequestTemplateIndex(self.config.get("request_samples", 1))
+        totals = {"page_validators": {}, "result_counts": {}, "capture_metrics": {}, "request_template_hits": {}}
+
+        mp_context = multiprocessing.get_context("spawn")
+        outbox = mp_context.Queue()
+        inboxes = [mp_context.Queue() for _ in range(self.shard_count)]
+        processes = [
+            mp_context.Process(target=run_shard, args=(self.config, shard_index, inboxes[shard_index], outbox), daemon=True)
+            for shard_index in range(self.shard_count)
+        ]
+        for process in processes:
+            process.start()
+
+        live = set(range(self.shard_count))
+        sent = [0] * self.shard_count
+        acknowledged = [0] * self.shard_count
+        assigned = set()
+
+        def route(urls):
+            buckets = {}
+            for url in urls:
+                key = Frontier.canonicalize(url)
+                if key in assigned:
+                    continue
+                assigned.add(key)
+                buckets.setdefault(shard_for_url(url, self.shard_count), []).append(url)
+            for shard_index, shard_urls in buckets.items():
+                if shard_index in live:
+                    inboxes[shard_index].put(("pages", shard_urls))
+                    sent[shard_index] += 1
+
+        route(self.config["starting_point"])
+        # Every shard gets a first batch, even an empty one, so each reports idle at least once
+        for shard_index in range(self.shard_count):
+            if not sent[shard_index]:
+                inboxes[shard_index].put(("pages", []))
+                sent[shard_index] = 1
+        print(
+            f"{self.ansi_colors.BLUE}Started {self.shard_count} shards for "
+            f"{len(self.config['starting_point'])} entry pages{self.ansi_colors.RESET}"
+        )
+
+        stopping = False
+        while live:
+            if not stopping and all(acknowledged[shard_index] == sent[shard_index] for shard_index in live):
+                for shard_index in live:
+                    inboxes[shard_index].put(("stop", None))
+                stopping = True
+
+            try:
+                kind, shard_index, payload = await loop.run_in_executor(None, outbox.get, True, 1)
+            except queue.Empty:
+                for shard_index in list(live):
+                    if not processes[shard_index].is_alive():
+                        logging.error(f"Shard {shard_index} exited without reporting its results")
+                        live.discard(shard_index)
+                continue
+
+            if kind == "pages":
+                route(payload)
+            elif kind == "idle":
+                acknowledged[shard_index] = payload
+            elif kind == "failed":
+                logging.error(f"Shard {shard_index} failed: {payload}")
+                live.discard(shard_index)
+            elif kind == "results":
+                if not stopping:
+                    logging.warning(f"Shard {shard_index} stopped early, pages routed to it later are not crawled")
+                self.merge_results(merged_results, seen_keys, payload)
+                self.add_totals(totals, payload)
+                live.discard(shard_index)
+
+        for process in processes:
+            process.join(timeout=10)
+
+        merged_results.update(totals)
+        return merged_results
+
+    @staticmethod
+    def add_totals(totals, crawling_results):
+        totals["page_validators"].update(crawling_results.get("page_validators", {}))
+        for kind, count in crawling_results.get("result_counts", {}).items():
+            totals["result_counts"][kind] = totals["result_counts"].get(kind, 0) + count
+        capture_metrics = totals["capture_metrics"]
+        for metric, value in crawling_results.get("capture_metrics", {}).items():
+            if metric == "max_backlog":
+                capture_metrics[metric] = max(capture_metrics.get(metric, 0), value)
+            else:
+                capture_metrics[metric] = capture_metrics.get(metric, 0) + value
+        template_hits = totals["request_template_hits"]
+        for template, hits in crawling_results.get("request_template_hits", {}).items():
+            template_hits[template] = template_hits.get(template, 0) + hits
+
+    @staticmethod
+    def merge_results(merged_results, seen_keys, crawling_results):
+        from .crawler import Crawler
+
+        def request_key(record):
+            request_info = json.loads(record)
+            template = request_info.get("template") or Crawler.request_key(
+                request_info["url"], request_info["method"], request_info["post_data"]
+            )
+            return template, "inserted_values" in request_info or "inserted_files" in request_info
+
+        def response_key(record):
+            response_info = json.loads(record)
+            return (response_info["url"], response_info["status"], response_info["request_method"])
+
+        def blocked_key(record):
+            blocked_info = json.loads(record)
+            return (blocked_info["url"], blocked_info["method"])
+
+        key_functions = {
+            "pages_to_test": lambda page: page,
+            "detected_elements": lambda element: element.get("hash"),
+            "detected_input_elements": lambda element: element.get("hash"),
+            "requests": request_key,
+            "static_requests": request_key,
+            "responses": response_key,
+            "static_responses": response_key,
+            "blocked_resources": blocked_key,
+        }
+
+        for result_key, key_function in key_functions.items():
+            for item in crawling_results.get(result_key, []):
+                item_key = key_function(item)
+                if isinstance(seen_keys[result_key], RequestTemplateIndex):
+                    if seen_keys[result_key].add(*item_key):
+                        merged_results[result_key].append(item)
+                elif item_key not in seen_keys[result_key]:
+                    seen_keys[result_key].add(item_key)
+                    merged_results[result_key].append(item)
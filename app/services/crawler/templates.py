@@ -0,0 +1,92 @@
+import hashlib
+import json
+import re
+from urllib.parse import parse_qs, urlparse
+
+from .frontier import Frontier
+
+MULTIPART_FIELD = re.compile(r'(?<!\w)name="([^"]*)"')
+
+
+def json_shape(value):
+    """The keys of a JSON value, nested, with every scalar reduced to '_'."""
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{key}:{json_shape(value[key])}" for key in sorted(value)) + "}"
+    if isinstance(value, list):
+        # Arrays are assumed to hold one kind of item
+        return "[" + (json_shape(value[0]) if value else "") + "]"
+    return "_"
+
+
+def body_shape(post_data):
+    if not post_data:
+        return ""
+    try:
+        return json_shape(json.loads(post_data))
+    except (ValueError, TypeError):
+        pass
+    field_names = MULTIPART_FIELD.findall(post_data)
+    if not field_names and "=" in post_data:
+        field_names = parse_qs(post_data, keep_blank_values=True)
+    return "form:" + ",".join(sorted(set(field_names))) if field_names else "raw"
+
+
+def request_template(url, method, post_data):
+    """64-bit key shared by requests that only differ in their values.
+
+    Built from the method, the path with ID-like segments masked, the sorted
+    query parameter names and the key shape of the body, so neither the filled
+    in values nor the parameter order make a request new.
+    """
+    parsed_url = urlparse(url)
+    parameter_names = sorted(parse_qs(parsed_url.query, keep_blank_values=True))
+    canonical = "\n".join(
+        (
+            method.upper(),
+            parsed_url.scheme,
+            parsed_url.netloc,
+            Frontier.path_shape(url),
+            ",".join(parameter_names),
+            body_shape(post_data),
+        )
+    )
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class RequestTemplateIndex:
+    """Counts hits per request template and decides which requests are kept as samples."""
+
+    def __init__(self, samples_per_template=1):
+        self.samples_per_template = samples_per_template
+        self.hits = {}
+        self.samples = {}
+
+    def add(self, template, attributed=False):
+        """Count a hit, returning True while the template still wants samples of this kind.
+
+        Requests carrying filled in values have a budget of their own, so a plain
+        request to the same endpoint, such as the login POST or a page's own
+        search GET, cannot take the slot of the form submission that follows.
+        """
+        self.hits[template] = self.hits.get(template, 0) + 1
+        sample_key = f"{template}:filled" if attributed else template
+        if self.samples.get(sample_key, 0) >= self.samples_per_template:
+            return False
+        self.samples[sample_key] = self.samples.get(sample_key, 0) + 1
+        return True
+
+    def __contains__(self, template):
+        return template in self.hits
+
+    def __len__(self):
+        return len(self.hits)
+
+    def to_state(self):
+        return {"hits": self.hits, "samples": self.samples}
+
+    @classmethod
+    def from_state(cls, state, samples_per_template=1):
+        index = cls(samples_per_template)
+        index.hits = dict(state.get("hits", {}))
+        index.samples = dict(state.get("samples", {}))
+        return index
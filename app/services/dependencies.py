@@ -5,6 +5,16 @@ from pathlib import Path
 from .authentication.authentication import Authentication
 from .crawler.crawler import Crawler
 from .crawler.helpers import CrawlerHelpers
+from .crawler.sharding import ShardCoordinator
+from .crawler.checkpoint import CheckpointStore
+from .crawler.recrawl import RecrawlIndex
+from .crawler.blobs import BlobStore
+from .crawler.routing import ResourceBlocker
+from .crawler.settle import PageSettler
+from .crawler.capture import CapturePipeline
+from .crawler.bodies import BodyPolicy
+from .crawler.har import HarWriter
+from .crawler.results import ResultStore, CountingResultStore, NdjsonResultStore, results_directory
 from ..common.helpers import CommonHelpers
 from .authentication.helpers import AuthenticationHelpers
 from ..common.ansi_colors import ANSIColors
@@ -39,12 +49,56 @@ class DependencyManager:
         try:
             authentication_helpers = AuthenticationHelpers(config)
             authentication = Authentication(authentication_helpers)
-            crawler = Crawler(authentication, config, self.crawler_helpers, self.common_helpers)
+            checkpoint_store = CheckpointStore(config["checkpoint_path"]) if config.get("checkpoint_path") else None
+            recrawl_index = RecrawlIndex.load(config["recrawl_path"]) if config.get("recrawl_path") else None
+            result_store = self.get_result_store(config)
+            resource_blocker = (
+                ResourceBlocker(config["block_resources"], config.get("block_mode", "abort"))
+                if config.get("block_resources")
+                else None
+            )
+            page_settler = PageSettler(
+                config.get("settle_quiet_ms", 300),
+                config.get("settle_timeout_ms", 5000),
+                config.get("settle_long_poll_ms", 1500),
+            )
+            blob_store = BlobStore(config["blob_dir"]) if config.get("blob_dir") else None
+            body_policy = BodyPolicy(config.get("max_body_size"), config.get("skip_body_types", BodyPolicy.DEFAULT_SKIP_TYPES))
+            capture_pipeline = CapturePipeline(config.get("capture_queue_size", 1000), config.get("capture_workers", 4))
+            har_writer = HarWriter(config["har_path"], append=config.get("resume")) if config.get("har_path") else None
+            crawler = Crawler(
+                authentication,
+                config,
+                self.crawler_helpers,
+                self.common_helpers,
+                checkpoint_store=checkpoint_store,
+                recrawl_index=recrawl_index,
+                result_store=result_store,
+                blob_store=blob_store,
+                resource_blocker=resource_blocker,
+                page_settler=page_settler,
+                capture_pipeline=capture_pipeline,
+                body_policy=body_policy,
+                har_writer=har_writer,
+            )
             return crawler
         except Exception as e:
             print(f"{self.ansi_colors.RED}Error creating crawler: {e}{self.ansi_colors.RESET}")
             return None
 
+    def get_result_store(self, config):
+        """Create the store captured traffic is written to"""
+        results_mode = config.get("results_mode", "memory")
+        if results_mode == "ndjson":
+            return NdjsonResultStore(results_directory(config), append=config.get("resume"))
+        if results_mode == "counters":
+            return CountingResultStore()
+        return ResultStore()
+
+    def get_shard_coordinator(self, config):
+        """Create a coordinator that spreads the crawl across worker processes"""
+        return ShardCoordinator(config, self.ansi_colors)
+
     def get_loaded_data_info(self):
         """Get information about loaded JSON data"""
         loaded_files = list(self.common_helpers.json_data.keys())
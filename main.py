@@ -16,6 +16,9 @@ sys.path.insert(0, str(Path(__file__).parent / "app"))
 
 from app.services.dependencies import DependencyManager
 from app.common.ansi_colors import ANSIColors
+from app.services.crawler.results import results_directory
+from app.services.crawler.routing import ResourceBlocker
+from app.services.crawler.bodies import BodyPolicy
 
 
 class WebCrawler:
@@ -59,6 +62,50 @@ Examples:
 
   # Crawl with output to specific directory
   python3 main.py --entrypoint https://example.com --output ./crawl_results
+
+  # Crawl with four concurrent pages
+  python3 main.py --entrypoint https://example.com --workers 4
+
+  # Split the crawl across four processes, each with two concurrent pages
+  python3 main.py --entrypoint https://example.com --shards 4 --workers 2
+
+  # Checkpoint a long crawl and resume it after an interruption
+  python3 main.py --entrypoint https://example.com --checkpoint crawl.db
+  python3 main.py --entrypoint https://example.com --resume crawl.db
+
+  # Nightly recrawl that skips pages unchanged since the last run
+  python3 main.py --entrypoint https://example.com --recrawl example.com_crawl_results.json
+
+  # Stream captured traffic to NDJSON files instead of holding it in memory
+  python3 main.py --entrypoint https://example.com --results-mode ndjson
+
+  # Export the captured traffic as HAR, and start a later crawl from a HAR without rediscovering it
+  python3 main.py --entrypoint https://example.com --har example.com.har
+  python3 main.py --entrypoint https://example.com --seed-har proxy_export.har
+
+  # Keep each distinct response body once on disk, and at most 1 MB of any of them
+  python3 main.py --entrypoint https://example.com --blob-dir ./blobs --max-body-size 1048576
+
+  # Skip downloading images, fonts and media altogether
+  python3 main.py --entrypoint https://example.com --block-resources image,font,media
+
+  # Only scan what each click reveals instead of the whole page again
+  python3 main.py --entrypoint https://example.com --detection-mode incremental
+
+  # Explore repeated header, nav and footer forms only once per site
+  python3 main.py --entrypoint https://example.com --template-scope site
+
+  # Infinite-scroll pages: scan only what scrolling reveals, at most 100 viewports deep
+  python3 main.py --entrypoint https://example.com --scroll-mode observer --scroll-budget 100
+
+  # Keep three differently filled copies of every request instead of one
+  python3 main.py --entrypoint https://example.com --request-samples 3
+
+  # Headless Chromium on a server without a display
+  python3 main.py --entrypoint https://example.com --browser chromium --headless
+
+  # Reuse a browser kept running by a Node browserType.launchServer({ port: 3000, wsPath: "crawler" })
+  python3 main.py --entrypoint https://example.com --browser chromium --browser-server ws://localhost:3000/crawler
             """
         )
 
@@ -113,6 +160,207 @@ Examples:
             help="Suppress non-essential output"
         )
 
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of pages crawled concurrently in the same browser context (default: 1)"
+        )
+
+        parser.add_argument(
+            "--shards",
+            type=int,
+            default=1,
+            help="Number of worker processes, each with its own browser, that split the crawl by URL hash (default: 1)"
+        )
+
+        parser.add_argument(
+            "--frontier-order",
+            choices=["bfs", "dfs", "novelty"],
+            default="bfs",
+            help="Order in which discovered pages are crawled; novelty favours unseen path shapes (default: bfs)"
+        )
+
+        # Browser
+        browser_group = parser.add_argument_group("Browser")
+        browser_group.add_argument(
+            "--browser",
+            choices=["firefox", "chromium", "webkit"],
+            default="firefox",
+            help="Browser engine to crawl with (default: firefox)"
+        )
+        browser_group.add_argument(
+            "--headless",
+            action="store_true",
+            help="Run the browser without a window, so no display or Xvfb is needed"
+        )
+        browser_group.add_argument(
+            "--browser-server",
+            help="WebSocket endpoint of a Playwright browser server to connect to instead of launching a browser. "
+                 "A browserType.launchServer() endpoint keeps one browser warm across jobs; "
+                 "`playwright run-server` only keeps the driver warm and still starts a fresh browser per job"
+        )
+
+        # Checkpointing
+        checkpoint_group = parser.add_argument_group("Checkpointing")
+        checkpoint_group.add_argument(
+            "--checkpoint",
+            help="SQLite file to periodically save crawl state to"
+        )
+        checkpoint_group.add_argument(
+            "--checkpoint-interval",
+            type=int,
+            default=10,
+            help="Number of crawled pages between checkpoints (default: 10)"
+        )
+        checkpoint_group.add_argument(
+            "--resume",
+            help="Checkpoint file to continue an interrupted crawl from (use the same target arguments)"
+        )
+
+        parser.add_argument(
+            "--recrawl",
+            help="Results file from a previous crawl; pages that have not changed since reuse its elements and requests"
+        )
+
+        parser.add_argument(
+            "--results-mode",
+            choices=["memory", "ndjson", "counters"],
+            default="memory",
+            help="Keep captured traffic in memory, stream it to per-type NDJSON files while crawling, "
+                 "or only count it (default: memory)"
+        )
+
+        parser.add_argument(
+            "--har",
+            help="Also stream every captured request and response to this HAR 1.2 file while crawling; "
+                 "with --resume, the entries of an existing file are continued"
+        )
+
+        parser.add_argument(
+            "--seed-har",
+            help="HAR file from an earlier crawl or another tool; its pages are queued and its requests "
+                 "count as already captured"
+        )
+
+        parser.add_argument(
+            "--blob-dir",
+            help="Store kept response bodies once per SHA-256 digest in this directory instead of inline in the results"
+        )
+
+        parser.add_argument(
+            "--max-body-size",
+            type=int,
+            help="Largest response body in bytes kept whole; bodies declaring a larger Content-Length are not "
+                 "fetched at all, larger undeclared text bodies keep only a prefix of this size, "
+                 "larger undeclared binary bodies only their digest and size"
+        )
+
+        parser.add_argument(
+            "--skip-body-types",
+            default=",".join(BodyPolicy.DEFAULT_SKIP_TYPES),
+            help="Comma-separated content type fragments whose bodies are never fetched, "
+                 "only their type and declared size are recorded "
+                 f"(default: {','.join(BodyPolicy.DEFAULT_SKIP_TYPES)})"
+        )
+
+        parser.add_argument(
+            "--block-resources",
+            help="Comma-separated resource types to block before they hit the network, "
+                 "e.g. image,font,media,stylesheet (only a metadata record is kept for each)"
+        )
+
+        parser.add_argument(
+            "--block-mode",
+            choices=["abort", "stub"],
+            default="abort",
+            help="Abort blocked requests or answer them with an empty stub response (default: abort)"
+        )
+
+        parser.add_argument(
+            "--settle-quiet-ms",
+            type=int,
+            default=300,
+            help="How long the DOM must stay unchanged, with no requests in flight, "
+                 "before a page counts as settled (default: 300)"
+        )
+
+        parser.add_argument(
+            "--settle-timeout-ms",
+            type=int,
+            default=5000,
+            help="Upper bound on waiting for a page to settle after an action (default: 5000)"
+        )
+
+        parser.add_argument(
+            "--settle-long-poll-ms",
+            type=int,
+            default=1500,
+            help="How long a request to an endpoint the page already requested before may stay open "
+                 "before it is taken for a long poll and no longer waited on (default: 1500)"
+        )
+
+        parser.add_argument(
+            "--detection-mode",
+            choices=["full", "incremental"],
+            default="full",
+            help="After a click, rescan and re-read every detected element (full) or only "
+                 "what the click added or changed since the last scan (incremental) (default: full)"
+        )
+
+        parser.add_argument(
+            "--template-scope",
+            choices=["page", "site"],
+            default="page",
+            help="Treat a form as already explored only on the page it was found on (page), or on "
+                 "every page sharing the layout (site); clickables are always matched site-wide (default: page)"
+        )
+
+        parser.add_argument(
+            "--request-samples",
+            type=int,
+            default=1,
+            help="Requests kept per request template, i.e. per method, path, parameter names and "
+                 "body shape, whatever values were filled in (default: 1)"
+        )
+
+        parser.add_argument(
+            "--capture-queue-size",
+            type=int,
+            default=1000,
+            help="Captured requests and responses that may wait for processing before "
+                 "clicking is held back (default: 1000)"
+        )
+
+        parser.add_argument(
+            "--capture-workers",
+            type=int,
+            default=4,
+            help="Concurrent consumers processing captured requests and responses (default: 4)"
+        )
+
+        parser.add_argument(
+            "--scroll-mode",
+            choices=["interval", "observer"],
+            default="interval",
+            help="Rescan the whole page on a fixed timer while scrolling (interval), or scan only "
+                 "content revealed by scrolling and wait until scrolling is done (observer) (default: interval)"
+        )
+
+        parser.add_argument(
+            "--scroll-budget",
+            type=int,
+            default=30,
+            help="Most viewport-sized scroll steps taken per page scan, which bounds infinite scroll (default: 30)"
+        )
+
+        parser.add_argument(
+            "--element-html",
+            action="store_true",
+            help="Keep the full innerHTML of every detected element and input set in the results "
+                 "(by default only short plain text is kept, markup is left in the page)"
+        )
+
         parser.add_argument(
             "--format",
             choices=["json", "txt"],
@@ -149,8 +397,66 @@ Examples:
         if args.auth and args.loginurl and not self._is_valid_url(args.loginurl):
             errors.append(f"Invalid login URL: {args.loginurl}")
 
+        if args.workers < 1:
+            errors.append("--workers must be at least 1")
+
+        if args.shards < 1:
+            errors.append("--shards must be at least 1")
+
+        if args.checkpoint_interval < 1:
+            errors.append("--checkpoint-interval must be at least 1")
+
+        if args.checkpoint and args.resume:
+            errors.append("Use either --checkpoint to start a crawl or --resume to continue one, not both "
+                          "(a resumed crawl keeps checkpointing to the file it resumed from)")
+
+        if args.resume and not Path(args.resume).exists():
+            errors.append(f"Checkpoint not found: {args.resume}")
+
+        if args.max_body_size is not None and args.max_body_size < 0:
+            errors.append("--max-body-size cannot be negative")
+
+        if args.block_resources:
+            unknown_types = set(self._split_list(args.block_resources)) - set(ResourceBlocker.RESOURCE_TYPES)
+            if unknown_types:
+                errors.append(
+                    f"Unknown resource types for --block-resources: {', '.join(sorted(unknown_types))} "
+                    f"(choose from {', '.join(ResourceBlocker.RESOURCE_TYPES)})"
+                )
+
+        if args.settle_quiet_ms < 0 or args.settle_timeout_ms < 0 or args.settle_long_poll_ms < 0:
+            errors.append("--settle-quiet-ms, --settle-timeout-ms and --settle-long-poll-ms cannot be negative")
+
+        if args.scroll_budget < 0:
+            errors.append("--scroll-budget cannot be negative")
+
+        if args.request_samples < 1:
+            errors.append("--request-samples must be at least 1")
+
+        if args.capture_queue_size < 1 or args.capture_workers < 1:
+            errors.append("--capture-queue-size and --capture-workers must be at least 1")
+
+        if args.browser_server and not args.browser_server.startswith(("ws://", "wss://")):
+            errors.append(f"Invalid browser server endpoint: {args.browser_server}")
+
+        if args.seed_har and not Path(args.seed_har).exists():
+            errors.append(f"HAR file not found: {args.seed_har}")
+
+        if args.shards > 1 and (args.har or args.seed_har):
+            errors.append("--har and --seed-har cannot be combined with --shards")
+
+        if args.recrawl and not Path(args.recrawl).exists():
+            errors.append(f"Previous results not found: {args.recrawl}")
+
+        if args.shards > 1 and (args.checkpoint or args.resume):
+            errors.append("--checkpoint and --resume cannot be combined with --shards")
+
         return errors
 
+    def _split_list(self, value):
+        """Split a comma-separated argument into its non-empty items"""
+        return [item.strip() for item in value.split(",") if item.strip()]
+
     def _is_valid_url(self, url):
         """Basic URL validation"""
         return url and (url.startswith('http://') or url.startswith('https://'))
@@ -167,7 +473,36 @@ Examples:
             "output": args.output or ".",
             "verbose": args.verbose,
             "quiet": args.quiet,
-            "format": args.format
+            "format": args.format,
+            "workers": args.workers,
+            "shard_count": args.shards,
+            "frontier_order": args.frontier_order,
+            "checkpoint_path": args.checkpoint or args.resume,
+            "checkpoint_interval": args.checkpoint_interval,
+            "resume": bool(args.resume),
+            "recrawl_path": args.recrawl,
+            "results_mode": args.results_mode,
+            "har_path": args.har,
+            "seed_har": args.seed_har,
+            "blob_dir": args.blob_dir,
+            "max_body_size": args.max_body_size,
+            "skip_body_types": self._split_list(args.skip_body_types),
+            "block_resources": self._split_list(args.block_resources) if args.block_resources else [],
+            "block_mode": args.block_mode,
+            "settle_quiet_ms": args.settle_quiet_ms,
+            "settle_timeout_ms": args.settle_timeout_ms,
+            "settle_long_poll_ms": args.settle_long_poll_ms,
+            "detection_mode": args.detection_mode,
+            "template_scope": args.template_scope,
+            "element_html": args.element_html,
+            "scroll_mode": args.scroll_mode,
+            "scroll_budget": args.scroll_budget,
+            "request_samples": args.request_samples,
+            "capture_queue_size": args.capture_queue_size,
+            "capture_workers": args.capture_workers,
+            "browser": args.browser,
+            "headless": args.headless,
+            "browser_server": args.browser_server
         }
 
         # Determine base URL and starting points
@@ -205,6 +540,13 @@ Examples:
 
         return urls
 
+    def result_count(self, results, key):
+        """Number of results of one kind, including ones streamed to disk instead of kept"""
+        records = results.get(key, [])
+        if records:
+            return len(records)
+        return results.get("result_counts", {}).get(key, 0)
+
     def save_results(self, results, config):
         """Save crawling results to file"""
         output_dir = Path(config["output"])
@@ -228,14 +570,14 @@ Examples:
                 f.write(f"Starting Points: {', '.join(config.get('starting_point', []))}\n")
                 f.write(f"Crawl Time: {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
                 
-                f.write(f"Pages Discovered: {len(results.get('pages_to_test', []))}\n")
+                f.write(f"Pages Discovered: {self.result_count(results, 'pages_to_test')}\n")
                 for page in results.get('pages_to_test', []):
                     f.write(f"  - {page}\n")
                 
-                f.write(f"\nElements Detected: {len(results.get('detected_elements', []))}\n")
-                f.write(f"Input Elements: {len(results.get('detected_input_elements', []))}\n")
-                f.write(f"Requests Captured: {len(results.get('requests', []))}\n")
-                f.write(f"Static Requests: {len(results.get('static_requests', []))}\n")
+                f.write(f"\nElements Detected: {self.result_count(results, 'detected_elements')}\n")
+                f.write(f"Input Elements: {self.result_count(results, 'detected_input_elements')}\n")
+                f.write(f"Requests Captured: {self.result_count(results, 'requests')}\n")
+                f.write(f"Static Requests: {self.result_count(results, 'static_requests')}\n")
 
         return output_file
 
@@ -259,19 +601,32 @@ Examples:
                 config["base_url"] = f"{parsed.scheme}://{parsed.netloc}"
                 config["starting_point"] = urls
 
-            # Get crawler instance
-            crawler = await self.dependency_manager.get_crawler(config)
-            if not crawler:
-                print(f"{self.ansi_colors.RED}Failed to initialize crawler{self.ansi_colors.RESET}")
-                return False
-
-            if not config["quiet"]:
-                print(f"{self.ansi_colors.GREEN}Crawler initialized successfully{self.ansi_colors.RESET}")
-                print(f"\n{self.ansi_colors.BLUE}Starting crawl of: {config['base_url']}{self.ansi_colors.RESET}")
-                print(f"{self.ansi_colors.BLUE}Entry points: {len(config['starting_point'])}{self.ansi_colors.RESET}")
+            if config["shard_count"] > 1:
+                # Each shard process builds its own crawler and browser
+                coordinator = self.dependency_manager.get_shard_coordinator(config)
+                if not config["quiet"]:
+                    print(f"\n{self.ansi_colors.BLUE}Starting sharded crawl of: {config['base_url']}{self.ansi_colors.RESET}")
+                    print(f"{self.ansi_colors.BLUE}Entry points: {len(config['starting_point'])}, shards: {config['shard_count']}{self.ansi_colors.RESET}")
+                crawling_results = await coordinator.run()
+            else:
+                # Get crawler instance
+                crawler = await self.dependency_manager.get_crawler(config)
+                if not crawler:
+                    print(f"{self.ansi_colors.RED}Failed to initialize crawler{self.ansi_colors.RESET}")
+                    return False
 
-            # Run the crawler
-            crawling_results = await self.dependency_manager.common_helpers.run_crawler(crawler)
+                if not config["quiet"]:
+                    print(f"{self.ansi_colors.GREEN}Crawler initialized successfully{self.ansi_colors.RESET}")
+                    print(f"\n{self.ansi_colors.BLUE}Starting crawl of: {config['base_url']}{self.ansi_colors.RESET}")
+                    print(f"{self.ansi_colors.BLUE}Entry points: {len(config['starting_point'])}{self.ansi_colors.RESET}")
+
+                # Run the crawler
+                crawling_results = await self.dependency_manager.common_helpers.run_crawler(
+                    crawler,
+                    browser_type=config["browser"],
+                    headless=config["headless"],
+                    ws_endpoint=config["browser_server"],
+                )
             
             if not crawling_results:
                 print(f"{self.ansi_colors.RED}Crawling failed - no results obtained{self.ansi_colors.RESET}")
@@ -285,11 +640,14 @@ Examples:
             if not config["quiet"]:
                 print(f"\n{self.ansi_colors.GREEN}Crawling completed successfully!{self.ansi_colors.RESET}")
                 print(f"\n{self.ansi_colors.BLUE}=== CRAWL SUMMARY ==={self.ansi_colors.RESET}")
-                print(f"  • Pages discovered: {self.ansi_colors.GREEN}{len(crawling_results.get('pages_to_test', []))}{self.ansi_colors.RESET}")
-                print(f"  • Elements detected: {self.ansi_colors.GREEN}{len(crawling_results.get('detected_elements', []))}{self.ansi_colors.RESET}")
-                print(f"  • Input elements: {self.ansi_colors.GREEN}{len(crawling_results.get('detected_input_elements', []))}{self.ansi_colors.RESET}")
-                print(f"  • Requests captured: {self.ansi_colors.GREEN}{len(crawling_results.get('requests', []))}{self.ansi_colors.RESET}")
-                print(f"  • Static requests: {self.ansi_colors.GREEN}{len(crawling_results.get('static_requests', []))}{self.ansi_colors.RESET}")
+                print(f"  • Pages discovered: {self.ansi_colors.GREEN}{self.result_count(crawling_results, 'pages_to_test')}{self.ansi_colors.RESET}")
+                print(f"  • Elements detected: {self.ansi_colors.GREEN}{self.result_count(crawling_results, 'detected_elements')}{self.ansi_colors.RESET}")
+                print(f"  • Input elements: {self.ansi_colors.GREEN}{self.result_count(crawling_results, 'detected_input_elements')}{self.ansi_colors.RESET}")
+                print(f"  • Requests captured: {self.ansi_colors.GREEN}{self.result_count(crawling_results, 'requests')}{self.ansi_colors.RESET}")
+                print(f"  • Static requests: {self.ansi_colors.GREEN}{self.result_count(crawling_results, 'static_requests')}{self.ansi_colors.RESET}")
+                print(f"  • Request templates: {self.ansi_colors.GREEN}{len(crawling_results.get('request_template_hits', {}))}{self.ansi_colors.RESET}")
+                if config["block_resources"]:
+                    print(f"  • Blocked resources: {self.ansi_colors.GREEN}{self.result_count(crawling_results, 'blocked_resources')}{self.ansi_colors.RESET}")
                 print(f"  • Execution time: {self.ansi_colors.GREEN}{int(minutes)}m {int(seconds)}s{self.ansi_colors.RESET}")
 
             # Save results
@@ -297,6 +655,8 @@ Examples:
                 output_file = self.save_results(crawling_results, config)
                 if not config["quiet"]:
                     print(f"\n{self.ansi_colors.BLUE}Results saved to: {self.ansi_colors.GREEN}{output_file}{self.ansi_colors.RESET}")
+                    if config["results_mode"] == "ndjson":
+                        print(f"{self.ansi_colors.BLUE}Captured traffic streamed to: {self.ansi_colors.GREEN}{results_directory(config)}{self.ansi_colors.RESET}")
             except Exception as e:
                 print(f"{self.ansi_colors.YELLOW}Warning: Could not save results to file: {e}{self.ansi_colors.RESET}")
 